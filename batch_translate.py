@@ -0,0 +1,445 @@
+import argparse
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
+
+import cv2
+
+from detection_governor import DetectionGovernor
+from hand_detector import HandDetector
+from landmark_log import LandmarkRecorder
+from sign_translator import SignTranslator
+from video_source import VideoSource
+
+SUBTITLE_FORMATS = {'srt': '.srt', 'vtt': '.vtt', 'jsonl': '.jsonl'}
+
+
+def format_timestamp(seconds, separator=','):
+    """Formate un temps en HH:MM:SS,mmm (SRT) ou HH:MM:SS.mmm (WebVTT)"""
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+class SubtitleWriter:
+    """Écrit les signes reconnus au fil de l'eau (SRT, WebVTT ou JSON Lines)
+
+    Un sous-titre dure cue_duration secondes, ou jusqu'au signe suivant.
+    Il est donc écrit à l'arrivée du signe suivant (ou à la fermeture).
+    """
+
+    def __init__(self, stream, subtitle_format='srt', cue_duration=2.0, source=None):
+        self.stream = stream
+        self.format = subtitle_format
+        self.cue_duration = cue_duration
+        self.source = source
+        self.pending = None
+        self.count = 0
+
+        if self.format == 'vtt':
+            self.stream.write("WEBVTT\n\n")
+
+    def add(self, sign, start):
+        """Ajoute un signe reconnu à l'instant start (secondes)"""
+        if self.pending is not None:
+            self._write(*self.pending, next_start=start)
+        self.pending = (sign, start)
+
+    def close(self):
+        """Écrit le dernier signe en attente"""
+        if self.pending is not None:
+            self._write(*self.pending, next_start=None)
+            self.pending = None
+        self.stream.flush()
+
+    def _write(self, sign, start, next_start):
+        end = start + self.cue_duration
+        if next_start is not None:
+            end = min(end, next_start)
+        self.count += 1
+
+        if self.format == 'jsonl':
+            record = {'sign': sign, 'start': round(start, 3), 'end': round(end, 3)}
+            if self.source:
+                record['file'] = self.source
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif self.format == 'vtt':
+            self.stream.write(
+                f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{sign}\n\n"
+            )
+        else:
+            self.stream.write(
+                f"{self.count}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{sign}\n\n"
+            )
+        self.stream.flush()
+
+
+class EventCollector:
+    """Garde les signes reconnus en mémoire (segments traités en parallèle)"""
+
+    def __init__(self):
+        self.events = []
+
+    def add(self, sign, start):
+        self.events.append((sign, start))
+
+
+def translate_video(video_path, writer, detector=None, mirror=True, start_time=0.0, end_time=None,
+                    emit_from=None, translator=None, recorder=None, recognition_mode=None):
+    """Traduit une vidéo aussi vite que possible et écrit les signes reconnus
+
+    Les temps utilisés sont ceux de la vidéo (CAP_PROP_POS_MSEC) et non
+    l'heure système. Les frames situées avant emit_from servent uniquement à
+    amorcer l'état de reconnaissance (chevauchement entre segments).
+    recorder : LandmarkRecorder optionnel qui enregistre les mains détectées.
+    recognition_mode : 'frame' ou 'sequence' (par défaut celui du traducteur).
+    Retourne (nombre de frames, nombre de signes).
+    """
+    if detector is None:
+        detector = HandDetector()
+    detector.reset_tracking()
+    own_translator = translator is None
+    if own_translator:
+        translator = SignTranslator()
+    # Nouvel état de reconnaissance pour chaque vidéo (bibliothèque partagée)
+    session = translator.new_session(recognition_mode)
+    if emit_from is None:
+        emit_from = start_time
+
+    video_source = VideoSource()
+    if not video_source.open_local_video(video_path, threaded=True, fast=True, start_msec=start_time * 1000):
+        if own_translator:
+            translator.close()
+        return 0, 0
+
+    frames = 0
+    signs = 0
+    try:
+        while True:
+            ret, frame, _, _ = video_source.read_next(timeout=1.0)
+            if not ret:
+                if video_source.is_finished():
+                    break
+                continue
+
+            timestamp = video_source.get_position_msec() / 1000.0
+            if end_time is not None and timestamp >= end_time:
+                break
+            emit = timestamp >= emit_from
+            if emit:
+                frames += 1
+
+            # Même orientation que la caméra en direct (gestes appris en miroir)
+            if mirror:
+                frame = cv2.flip(frame, 1)
+
+            hands = detector.detect_hands(frame, timestamp)
+            if recorder is not None:
+                recorder.write(hands, timestamp)
+            if not hands:
+                session.translate(None, timestamp=timestamp)
+                continue
+
+            sign = session.translate(hands, timestamp=timestamp)
+            if emit and sign and sign not in ("Aucune main détectée", "En apprentissage...", "Format de données invalide"):
+                writer.add(sign, timestamp)
+                signs += 1
+    finally:
+        video_source.release()
+        if own_translator:
+            translator.close()
+
+    return frames, signs
+
+
+def video_duration(video_path):
+    """Durée d'une vidéo en secondes (0 si inconnue)"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if not cap.isOpened() or not fps or fps <= 0 or frame_count <= 0:
+            return 0
+        return frame_count / fps
+    finally:
+        cap.release()
+
+
+def split_segments(duration, segment_length):
+    """Découpe une durée en segments [début, fin) ; la fin du dernier est None"""
+    if not duration or segment_length <= 0 or duration <= segment_length:
+        return [(0.0, None)]
+    count = int(duration // segment_length)
+    if duration - count * segment_length < segment_length / 4:
+        # Éviter un dernier segment trop court
+        count -= 1
+    segments = [(i * segment_length, (i + 1) * segment_length) for i in range(count)]
+    segments.append((count * segment_length, None))
+    return segments
+
+
+def merge_segments(segment_events, cooldown):
+    """Fusionne les signes des segments d'une même vidéo
+
+    Chaque segment ne garde que les signes de sa propre plage, mais l'état
+    amorcé dans le chevauchement peut différer légèrement de celui d'un
+    traitement continu : un même signe répété à moins de cooldown secondes
+    (impossible en traitement continu) est donc un doublon de frontière.
+    """
+    events = sorted(
+        (event for events in segment_events for event in events),
+        key=lambda event: event[1]
+    )
+    merged = []
+    for sign, start in events:
+        if merged and merged[-1][0] == sign and start - merged[-1][1] < cooldown:
+            continue
+        merged.append((sign, start))
+    return merged
+
+
+# --- Traitement parallèle (un détecteur par processus) ---
+
+_worker = {}
+
+
+def make_detector(detector_options=None, max_skip=0, motion_threshold=3.0):
+    """Détecteur de mains, limité par le mouvement si max_skip > 0
+
+    detector_options : arguments de HandDetector (moteur, modèle, région d'intérêt).
+    """
+    detector = HandDetector(**(detector_options or {}))
+    if max_skip > 0:
+        return DetectionGovernor(detector, motion_threshold=motion_threshold, max_skip=max_skip)
+    return detector
+
+
+def _init_worker(mirror, detector_options=None, max_skip=0, motion_threshold=3.0, recognition_mode=None):
+    """Initialise un processus de travail : détecteur et bibliothèque en lecture seule"""
+    # Un thread OpenCV par processus : les processus se partagent déjà les cœurs
+    cv2.setNumThreads(1)
+    _worker['translator'] = SignTranslator()
+    # Bibliothèque fermée à la sortie normale du processus (pool.close puis join)
+    multiprocessing.util.Finalize(None, _worker['translator'].close, exitpriority=10)
+    _worker['detector'] = make_detector(detector_options, max_skip, motion_threshold)
+    _worker['mirror'] = mirror
+    _worker['recognition_mode'] = recognition_mode
+
+
+def _process_segment(task):
+    """Traduit un segment de vidéo dans un processus de travail"""
+    video_index, segment_index, video_path, emit_from, end_time, overlap = task
+    collector = EventCollector()
+    detector = _worker['detector']
+    if isinstance(detector, DetectionGovernor):
+        detector.reset_stats()
+    frames = 0
+    try:
+        frames, _ = translate_video(
+            video_path,
+            collector,
+            detector=detector,
+            mirror=_worker['mirror'],
+            start_time=max(0.0, emit_from - overlap),
+            end_time=end_time,
+            emit_from=emit_from,
+            translator=_worker['translator'],
+            recognition_mode=_worker['recognition_mode']
+        )
+    except Exception as e:
+        print(f"Erreur lors du traitement de {video_path} ({emit_from:.0f}s): {str(e)}", file=sys.stderr)
+    report = detector.report() if isinstance(detector, DetectionGovernor) else None
+    return video_index, segment_index, collector.events, frames, report
+
+
+def translate_parallel(videos, open_output, workers, subtitle_format='srt', segment_length=60.0,
+                       overlap=3.0, chunksize=1, cue_duration=2.0, mirror=True, detector_options=None,
+                       max_skip=0, motion_threshold=3.0, recognition_mode=None):
+    """Répartit les vidéos (découpées en segments) sur un groupe de processus
+
+    open_output(chemin de la vidéo) retourne le flux de sortie d'une vidéo.
+    Les sous-titres d'une vidéo sont écrits dès que tous ses segments sont
+    terminés.
+    """
+    # Compacter le journal une fois pour que chaque processus charge
+    # directement les colonnes en mémoire partagée, sans écrire
+    translator = SignTranslator()
+    try:
+        translator.gesture_store.compact()
+        cooldown = translator.detection_cooldown
+    finally:
+        translator.close()
+
+    tasks = []
+    pending = {}
+    for video_index, video_path in enumerate(videos):
+        segments = split_segments(video_duration(video_path), segment_length)
+        pending[video_index] = [None] * len(segments)
+        for segment_index, (emit_from, end_time) in enumerate(segments):
+            tasks.append((video_index, segment_index, video_path, emit_from, end_time, overlap))
+
+    start = time.time()
+    frame_counts = {video_index: 0 for video_index in pending}
+    analysed = 0
+    skipped = 0
+    # spawn : MediaPipe ne supporte pas d'être copié par fork
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers, initializer=_init_worker, initargs=(mirror, detector_options, max_skip, motion_threshold, recognition_mode)) as pool:
+        for video_index, segment_index, events, frames, report in pool.imap_unordered(
+                _process_segment, tasks, chunksize=chunksize):
+            if report is not None:
+                analysed += report['frames']
+                skipped += report['skipped']
+            results = pending[video_index]
+            results[segment_index] = events
+            frame_counts[video_index] += frames
+            if any(result is None for result in results):
+                continue
+
+            video_path = videos[video_index]
+            merged = merge_segments(results, cooldown)
+            stream = open_output(video_path)
+            try:
+                writer = SubtitleWriter(stream, subtitle_format, cue_duration, source=video_path)
+                for sign, sign_start in merged:
+                    writer.add(sign, sign_start)
+                writer.close()
+            finally:
+                if stream is not sys.stdout:
+                    stream.close()
+            print(f"{video_path} : {frame_counts[video_index]} frames, {len(merged)} signes, "
+                  f"{len(results)} segment(s)", file=sys.stderr)
+        # Sortie normale des processus (et non terminate) : leur bibliothèque est fermée
+        pool.close()
+        pool.join()
+
+    elapsed = time.time() - start
+    total_frames = sum(frame_counts.values())
+    fps = total_frames / elapsed if elapsed > 0 else 0
+    print(f"Total : {total_frames} frames, {elapsed:.1f}s ({fps:.1f} FPS, {workers} processus)", file=sys.stderr)
+    if analysed:
+        print(f"Détections sautées : {skipped}/{analysed} ({100 * skipped / analysed:.0f}%)", file=sys.stderr)
+
+
+def output_path(video_path, subtitle_format, output_dir=None):
+    """Chemin du fichier de sous-titres associé à une vidéo"""
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    directory = output_dir or os.path.dirname(os.path.abspath(video_path))
+    return os.path.join(directory, base + SUBTITLE_FORMATS[subtitle_format])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Traduction hors ligne de vidéos en langue des signes (sans interface)"
+    )
+    parser.add_argument('videos', nargs='+', help="Fichiers vidéo à traduire")
+    parser.add_argument('--format', choices=sorted(SUBTITLE_FORMATS), default='srt',
+                        help="Format de sortie (srt, vtt ou jsonl)")
+    parser.add_argument('--output-dir', help="Dossier de sortie (par défaut : à côté de la vidéo)")
+    parser.add_argument('--stdout', action='store_true', help="Écrire les sous-titres sur la sortie standard")
+    parser.add_argument('--cue-duration', type=float, default=2.0, help="Durée maximale d'un sous-titre (s)")
+    parser.add_argument('--no-mirror', action='store_true', help="Ne pas retourner les frames horizontalement")
+    parser.add_argument('--roi', action='store_true',
+                        help="Ne détecter que dans la région autour des mains de la frame précédente")
+    parser.add_argument('--backend', choices=['legacy', 'video'], default='legacy',
+                        help="Moteur de détection : mp.solutions.hands ou HandLandmarker (mode VIDEO)")
+    parser.add_argument('--model-complexity', type=int, choices=[0, 1], default=1,
+                        help="Modèle léger (0) ou complet (1) du moteur legacy")
+    parser.add_argument('--model', default='hand_landmarker.task',
+                        help="Modèle .task du moteur HandLandmarker")
+    parser.add_argument('--max-skip', type=int, default=0,
+                        help="Frames sautées au plus d'affilée quand l'image bouge peu (0 : détection à chaque frame)")
+    parser.add_argument('--motion-threshold', type=float, default=3.0,
+                        help="Différence moyenne (0-255) entre frames réduites déclenchant une détection")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="Nombre de processus de traitement (0 : un par cœur)")
+    parser.add_argument('--segment-length', type=float, default=60.0,
+                        help="Durée des segments traités en parallèle dans une même vidéo (s)")
+    parser.add_argument('--mode', choices=['frame', 'sequence'], default='frame',
+                        help="Mode de reconnaissance : pose par pose ou séquence (DTW en continu)")
+    parser.add_argument('--overlap', type=float, default=3.0,
+                        help="Chevauchement entre segments pour amorcer la reconnaissance (s) ; "
+                             "en mode séquence, au moins la durée du plus long geste")
+    parser.add_argument('--record', action='store_true',
+                        help="Enregistrer aussi les mains détectées (.hlog) pour les rejouer avec landmark_log.py")
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help="Nombre de segments envoyés à la fois à chaque processus")
+    args = parser.parse_args(argv)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    def open_output(video_path):
+        if args.stdout:
+            return sys.stdout
+        return open(output_path(video_path, args.format, args.output_dir), 'w', encoding='utf-8')
+
+    detector_options = {
+        'roi_mode': args.roi,
+        'backend': args.backend,
+        'model_complexity': args.model_complexity,
+        'model_asset_path': args.model
+    }
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    if workers > 1 and args.record:
+        parser.error("--record n'est disponible qu'avec un seul processus")
+    if workers > 1:
+        translate_parallel(
+            args.videos,
+            open_output,
+            workers,
+            subtitle_format=args.format,
+            segment_length=args.segment_length,
+            overlap=args.overlap,
+            chunksize=args.chunksize,
+            cue_duration=args.cue_duration,
+            mirror=not args.no_mirror,
+            detector_options=detector_options,
+            max_skip=args.max_skip,
+            motion_threshold=args.motion_threshold,
+            recognition_mode=args.mode
+        )
+        return
+
+    detector = make_detector(detector_options, args.max_skip, args.motion_threshold)
+    # Une seule bibliothèque pour toutes les vidéos, fermée à la fin
+    translator = SignTranslator()
+    try:
+        for video_path in args.videos:
+            start = time.time()
+            stream = open_output(video_path)
+            recorder = None
+            if args.record:
+                recorder = LandmarkRecorder(os.path.splitext(output_path(video_path, args.format, args.output_dir))[0] + '.hlog')
+            try:
+                writer = SubtitleWriter(stream, args.format, args.cue_duration, source=video_path)
+                frames, signs = translate_video(video_path, writer, detector, mirror=not args.no_mirror,
+                                                translator=translator, recorder=recorder,
+                                                recognition_mode=args.mode)
+                writer.close()
+            finally:
+                if stream is not sys.stdout:
+                    stream.close()
+                if recorder is not None:
+                    recorder.close()
+
+            elapsed = time.time() - start
+            fps = frames / elapsed if elapsed > 0 else 0
+            print(f"{video_path} : {frames} frames, {signs} signes, {elapsed:.1f}s ({fps:.1f} FPS)", file=sys.stderr)
+    finally:
+        translator.close()
+
+    if isinstance(detector, DetectionGovernor):
+        report = detector.report()
+        print(f"Détections sautées : {report['skipped']}/{report['frames']} "
+              f"({100 * report['skip_ratio']:.0f}%)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import time
+
+import cv2
+
+from hand_frame import PALM_POINTS
+
+
+class DetectionGovernor:
+    """Limite le nombre de détections MediaPipe quand l'image bouge peu
+
+    Chaque frame est réduite en niveaux de gris et comparée à la dernière
+    frame réellement analysée. Tant que la différence reste sous
+    motion_threshold (et au plus max_skip frames d'affilée), la détection
+    est sautée : les points de repère sont extrapolés à partir des deux
+    dernières détections pour que le traducteur reçoive un flux régulier.
+    """
+
+    def __init__(self, detector, motion_threshold=3.0, max_skip=4, downscale=(80, 60), extrapolate=True):
+        self.detector = detector
+        self.motion_threshold = motion_threshold  # Différence moyenne (0-255) déclenchant une détection
+        self.max_skip = max_skip  # Nombre maximal de frames sautées d'affilée (0 : jamais)
+        self.downscale = downscale
+        self.extrapolate = extrapolate
+        self.max_velocity_gap = 0.5  # Au-delà (s) entre deux détections, pas d'extrapolation
+
+        self.reference = None
+        self.skipped_in_row = 0
+        self.last_hands = None
+        self.last_time = None
+        self.velocities = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Remet à zéro les statistiques de la session"""
+        self.frames = 0
+        self.detections = 0
+        self.skipped = 0
+
+    def reset_tracking(self):
+        """Oublie l'état précédent (changement de vidéo ou de source)"""
+        self.reference = None
+        self.skipped_in_row = 0
+        self.last_hands = None
+        self.last_time = None
+        self.velocities = None
+        self.detector.reset_tracking()
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.downscale, interpolation=cv2.INTER_AREA)
+
+    def detect_hands(self, frame, timestamp=None):
+        """Même interface que HandDetector.detect_hands, avec détections sautées"""
+        if timestamp is None:
+            timestamp = time.time()
+        self.frames += 1
+        thumbnail = self._thumbnail(frame)
+
+        if self.reference is not None and self.skipped_in_row < self.max_skip:
+            motion = cv2.absdiff(thumbnail, self.reference).mean()
+            if motion < self.motion_threshold:
+                self.skipped_in_row += 1
+                self.skipped += 1
+                return self._estimate(timestamp)
+
+        hands_info = self.detector.detect_hands(frame, timestamp)
+        self.detections += 1
+        self.skipped_in_row = 0
+        self.reference = thumbnail
+        self._update_velocities(hands_info, timestamp)
+        return hands_info
+
+    def _update_velocities(self, hands_info, timestamp):
+        """Vitesse des points de repère entre les deux dernières détections"""
+        self.velocities = None
+        if (
+            self.extrapolate
+            and hands_info and self.last_hands
+            and len(hands_info) == len(self.last_hands)
+            and 0 < timestamp - self.last_time <= self.max_velocity_gap
+        ):
+            dt = timestamp - self.last_time
+            velocities = []
+            for hand, previous in zip(hands_info, self.last_hands):
+                if hand.handedness_code != previous.handedness_code:
+                    velocities = None
+                    break
+                velocities.append((hand.landmarks - previous.landmarks) / dt)
+            self.velocities = velocities
+        self.last_hands = hands_info
+        self.last_time = timestamp
+
+    def _estimate(self, timestamp):
+        """Mains estimées pour une frame sautée"""
+        if not self.last_hands:
+            return None
+        if self.velocities is None:
+            # Main immobile : dernière détection répétée
+            return [hand.copy() for hand in self.last_hands]
+
+        dt = timestamp - self.last_time
+        hands_info = []
+        for hand, velocity in zip(self.last_hands, self.velocities):
+            estimated = hand.copy()
+            estimated.landmarks = hand.landmarks + velocity * dt
+            # Même déplacement que les points de la paume (poignet et bases des doigts)
+            estimated.palm = hand.palm + velocity[PALM_POINTS].mean(axis=0) * dt
+            hands_info.append(estimated)
+        return hands_info
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def report(self):
+        """Statistiques de la session : frames, détections, frames sautées"""
+        return {
+            'frames': self.frames,
+            'detections': self.detections,
+            'skipped': self.skipped,
+            'skip_ratio': self.skip_ratio
+        }
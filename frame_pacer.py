@@ -0,0 +1,109 @@
+import time
+from collections import deque
+
+
+class FramePacer:
+    """Cadence de rafraîchissement calée sur la fréquence de la source
+
+    Les échéances sont absolues (une période après la précédente) : le temps
+    passé à traiter une frame est donc retiré du délai suivant. Si le retard
+    dépasse une période, l'échéance est recalée sur l'heure actuelle au lieu
+    d'enchaîner les rattrapages. Une échéance sans nouvelle frame est
+    retentée un quart de période plus tard, sans décaler la suivante.
+
+    Utilisable avec Tk (root.after(pacer.next_delay_ms(), ...)) comme dans une
+    boucle sans interface (pacer.wait()).
+    """
+
+    def __init__(self, fps=30.0, default_fps=30.0, window=30):
+        self.default_fps = default_fps  # Cadence utilisée si la source ne la donne pas
+        self.fps = None
+        self.period = None
+        self.set_fps(fps)
+
+        self.next_time = None
+        self.shown_times = deque(maxlen=window)
+        self.last_seq = None
+        self.frames_shown = 0
+        self.dropped_frames = 0  # Frames capturées mais jamais affichées
+        self.empty_ticks = 0  # Échéances sans nouvelle frame
+        self.late_ticks = 0  # Échéances manquées de plus d'une période
+        self.waiting_frame = False
+
+    def set_fps(self, fps):
+        """Change la cadence cible (0 ou None : cadence par défaut)"""
+        fps = fps if fps and fps > 0 else self.default_fps
+        if fps != self.fps:
+            self.fps = fps
+            self.period = 1.0 / fps
+
+    def frame_shown(self, seq=None):
+        """Signale une frame affichée (seq : numéro de séquence de capture)"""
+        now = time.perf_counter()
+        self.waiting_frame = False
+        self.frames_shown += 1
+        self.shown_times.append(now)
+        if seq is not None:
+            if self.last_seq is not None and seq > self.last_seq:
+                self.dropped_frames += seq - self.last_seq - 1
+            # Numéro inférieur : nouvelle source, la séquence recommence
+            self.last_seq = seq
+
+    def frame_missed(self):
+        """Signale une échéance sans nouvelle frame à afficher"""
+        self.empty_ticks += 1
+        self.waiting_frame = True
+
+    def next_delay(self):
+        """Délai (secondes) jusqu'à la prochaine échéance"""
+        now = time.perf_counter()
+        if self.next_time is None:
+            self.next_time = now
+        if self.waiting_frame and now - self.next_time < self.period:
+            # Frame pas encore prête : nouvel essai rapide, même échéance
+            return self.period / 4
+        self.waiting_frame = False
+        self.next_time += self.period
+        delay = self.next_time - now
+        if delay < -self.period:
+            # Trop en retard : repartir de maintenant
+            self.late_ticks += 1
+            self.next_time = now
+            return 0.0
+        return max(0.0, delay)
+
+    def next_delay_ms(self):
+        """Délai en millisecondes entières (pour root.after)"""
+        return int(self.next_delay() * 1000)
+
+    def wait(self):
+        """Attend la prochaine échéance (boucle sans interface)"""
+        delay = self.next_delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    def reset(self):
+        """Changement de source : oublie l'échéance et la séquence"""
+        self.next_time = None
+        self.last_seq = None
+        self.waiting_frame = False
+        self.shown_times.clear()
+
+    @property
+    def achieved_fps(self):
+        """Cadence d'affichage mesurée sur les dernières frames"""
+        if len(self.shown_times) < 2:
+            return 0.0
+        elapsed = self.shown_times[-1] - self.shown_times[0]
+        return (len(self.shown_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        """Cadence cible et mesurée, frames perdues"""
+        return {
+            'target_fps': self.fps,
+            'achieved_fps': self.achieved_fps,
+            'frames_shown': self.frames_shown,
+            'dropped_frames': self.dropped_frames,
+            'empty_ticks': self.empty_ticks,
+            'late_ticks': self.late_ticks
+        }
@@ -0,0 +1,432 @@
+import threading
+
+import numpy as np
+
+from hand_frame import N_LANDMARKS, HAND_SLOTS, HandFrame, combine_hands, hand_slots
+from neighbor_index import NeighborIndex
+
+# Colonnes des tableaux de frames : nom -> (type, forme d'une frame)
+# Chaque frame a deux emplacements de main côte à côte (gauche, droite) ;
+# hand_presence indique les emplacements occupés (bit 0 gauche, bit 1 droite).
+FRAME_COLUMNS = {
+    'landmarks': (np.float32, (HAND_SLOTS, N_LANDMARKS, 3)),
+    'landmark_counts': (np.int32, (HAND_SLOTS,)),
+    'palm_positions': (np.float32, (HAND_SLOTS, 3)),
+    'palm_valid': (bool, (HAND_SLOTS,)),
+    'finger_masks': (np.uint8, (HAND_SLOTS,)),
+    'finger_present': (np.uint8, (HAND_SLOTS,)),
+    'hand_presence': (np.uint8, ()),
+}
+
+# Colonnes d'une main seule (HandFrame) -> attribut de HandFrame
+_SLOT_ATTRIBUTES = {
+    'landmarks': 'landmarks',
+    'landmark_counts': 'landmark_count',
+    'palm_positions': 'palm',
+    'palm_valid': 'palm_valid',
+    'finger_masks': 'finger_mask',
+    'finger_present': 'finger_present',
+}
+
+# Nombre de bits à 1 pour chaque valeur d'un octet (masques de doigts)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def empty_columns(columns=FRAME_COLUMNS, n=0):
+    """Tableaux de n frames vides (aucune main)"""
+    return {name: np.zeros((n,) + shape, dtype=dtype) for name, (dtype, shape) in columns.items()}
+
+
+def encode_sequence(sequence):
+    """Encode une séquence de frames en colonnes (voir FRAME_COLUMNS)"""
+    # Séquence déjà stockée sous forme de tableaux (bibliothèque binaire)
+    if hasattr(sequence, 'columns'):
+        return sequence.columns()
+
+    frames = [frame for frame in map(HandFrame.coerce, sequence) if frame is not None]
+    columns = empty_columns(FRAME_COLUMNS, len(frames))
+    for i, frame in enumerate(frames):
+        for slot, hand in enumerate(hand_slots(frame)):
+            if hand is None:
+                continue
+            columns['hand_presence'][i] |= 1 << slot
+            for name, attribute in _SLOT_ATTRIBUTES.items():
+                columns[name][i, slot] = getattr(hand, attribute)
+    return columns
+
+
+class MatcherSnapshot:
+    """Instantané immuable de la bibliothèque dans le moteur de correspondance
+
+    Noms, tableaux de frames, index des doigts et index des plus proches
+    voisins. Une modification de la bibliothèque construit un nouvel
+    instantané à côté et le publie en remplaçant une seule référence
+    (GestureMatcher.snapshot) : une reconnaissance en cours sur un autre
+    thread continue sur l'ancien instantané, toujours cohérent.
+    """
+
+    def __init__(self, names, lengths, columns):
+        self.names = list(names)
+        self.columns = columns
+        for name in FRAME_COLUMNS:
+            setattr(self, name, columns[name])
+
+        # Début de chaque geste dans les tableaux de frames
+        self.lengths = np.array(lengths, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths)[:-1])).astype(np.int64)
+        self.frame_gesture = np.repeat(np.arange(len(self.names)), self.lengths)
+        # Nombre maximal de mains de chaque geste (départage des scores égaux)
+        self.gesture_hands = (
+            np.maximum.reduceat(_POPCOUNT[self.hand_presence], self.offsets)
+            if len(self.names) else np.zeros(0, dtype=np.uint8)
+        )
+        self._build_finger_index()
+        self.neighbor_index = None
+
+    def _build_finger_index(self):
+        """Regroupe les frames par clé (masques et doigts présents des deux mains, mains présentes)"""
+        masks = self.finger_masks.astype(np.int32)
+        present = self.finger_present.astype(np.int32)
+        keys = (
+            masks[:, 0] | (present[:, 0] << 5) |
+            (masks[:, 1] << 10) | (present[:, 1] << 15) |
+            (self.hand_presence.astype(np.int32) << 20)
+        )
+        order = np.argsort(keys, kind='stable')
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        self.index_masks = np.stack((unique_keys & 0x1F, (unique_keys >> 10) & 0x1F), axis=1).astype(np.uint8)
+        self.index_present = np.stack(((unique_keys >> 5) & 0x1F, (unique_keys >> 15) & 0x1F), axis=1).astype(np.uint8)
+        self.index_presence = (unique_keys >> 20).astype(np.uint8)
+        self.index_frames = np.split(order, starts[1:]) if len(order) else []
+
+    @property
+    def frame_count(self):
+        """Nombre total de frames de référence"""
+        return len(self.hand_presence)
+
+
+class GestureMatcher:
+    """Moteur de correspondance vectorisé sur l'ensemble de la bibliothèque de gestes
+
+    Les lectures (match, score_frames...) utilisent l'instantané courant
+    sans verrou ; les modifications sont faites une à une et publient un
+    nouvel instantané (voir MatcherSnapshot).
+    """
+
+    def __init__(self):
+        # Score d'une main : doigts 40 %, paume 30 %, points de repère 30 % ;
+        # une main comparée à l'autre main de la référence compte pour moitié
+        self.finger_weight = 0.4
+        self.palm_weight = 0.3
+        self.landmark_weight = 0.3
+        self.wrong_hand_penalty = 0.5
+        self.max_palm_distance = 0.5
+
+        # Index des configurations de doigts (masques 5 bits des deux mains + mains présentes)
+        self.use_finger_index = True
+        # Distance de Hamming maximale avec la main courante (None : aucune).
+        # Sans limite, l'index ne fait qu'écarter les frames qui ne peuvent pas
+        # atteindre le seuil et les résultats sont exacts ; avec une limite,
+        # des frames proches par la paume et les landmarks peuvent être écartées.
+        self.max_finger_distance = None
+
+        # Index des plus proches voisins pour les grandes bibliothèques
+        self.use_neighbor_index = True
+        self.neighbor_index = NeighborIndex(self)
+
+        # Modifications de la bibliothèque une à une (les lectures n'attendent pas)
+        self.write_lock = threading.Lock()
+        self.snapshot = None
+        self.build({})
+
+    # Accès à l'instantané courant (une seule lecture cohérente par attribut)
+    @property
+    def names(self):
+        return self.snapshot.names
+
+    @property
+    def lengths(self):
+        return self.snapshot.lengths
+
+    @property
+    def offsets(self):
+        return self.snapshot.offsets
+
+    @property
+    def frame_count(self):
+        """Nombre total de frames de référence"""
+        return self.snapshot.frame_count
+
+    def build(self, custom_gestures):
+        """Empaquette toutes les frames de référence dans des tableaux contigus"""
+        names = []
+        lengths = []
+        encoded = []
+        for gesture_name, gesture_data in custom_gestures.items():
+            sequence = gesture_data.get('sequence', []) if isinstance(gesture_data, dict) else []
+            columns = encode_sequence(sequence)
+            if not len(columns['hand_presence']):
+                continue
+            names.append(gesture_name)
+            lengths.append(len(columns['hand_presence']))
+            encoded.append(columns)
+
+        self.load_columns(names, lengths, {
+            name: np.concatenate([columns[name] for columns in encoded])
+            if encoded else np.zeros((0,) + shape, dtype=dtype)
+            for name, (dtype, shape) in FRAME_COLUMNS.items()
+        })
+
+    def load_columns(self, names, lengths, columns):
+        """Utilise directement des tableaux de frames déjà encodés (sans copie)"""
+        with self.write_lock:
+            snapshot = MatcherSnapshot(names, lengths, columns)
+            snapshot.neighbor_index = self.neighbor_index.rebuild(snapshot)
+            self.snapshot = snapshot
+
+    def add_gesture(self, gesture_name, sequence):
+        """Ajoute (ou remplace) un geste sans réencoder toute la bibliothèque"""
+        new_columns = encode_sequence(sequence)
+        with self.write_lock:
+            old = self.snapshot
+            if gesture_name in old.names:
+                old = self._without(old, gesture_name)
+            if not len(new_columns['hand_presence']):
+                self.snapshot = old
+                return
+            snapshot = MatcherSnapshot(
+                old.names + [gesture_name],
+                list(old.lengths) + [len(new_columns['hand_presence'])],
+                {name: np.concatenate((old.columns[name], new_columns[name])) for name in FRAME_COLUMNS}
+            )
+            snapshot.neighbor_index = old.neighbor_index.added(gesture_name, len(new_columns['hand_presence']), snapshot)
+            self.snapshot = snapshot
+
+    def remove_gesture(self, gesture_name):
+        """Retire un geste des tableaux de frames"""
+        with self.write_lock:
+            if gesture_name in self.snapshot.names:
+                self.snapshot = self._without(self.snapshot, gesture_name)
+
+    def _without(self, old, gesture_name):
+        """Nouvel instantané sans le geste"""
+        g = old.names.index(gesture_name)
+        n_frames = int(old.lengths[g])
+        keep = old.frame_gesture != g
+        snapshot = MatcherSnapshot(
+            old.names[:g] + old.names[g + 1:],
+            np.delete(old.lengths, g),
+            {name: old.columns[name][keep] for name in FRAME_COLUMNS}
+        )
+        snapshot.neighbor_index = old.neighbor_index.removed(gesture_name, n_frames, snapshot)
+        return snapshot
+
+    def encode(self, features):
+        """Encode les caractéristiques des mains courantes pour la comparaison
+
+        block contient les deux emplacements (même disposition que les
+        colonnes) ; les autres entrées ne concernent que les k mains
+        présentes, dans l'ordre de slots.
+        """
+        frame = combine_hands(features)
+        block = empty_columns(FRAME_COLUMNS, 1)
+        block = {name: array[0] for name, array in block.items()}
+        slots = []
+        for slot, hand in enumerate(hand_slots(frame)):
+            if hand is None:
+                continue
+            slots.append(slot)
+            block['hand_presence'] |= np.uint8(1 << slot)
+            for name, attribute in _SLOT_ATTRIBUTES.items():
+                block[name][slot] = getattr(hand, attribute)
+        slots = np.array(slots, dtype=np.int64)
+        return {
+            'block': block,
+            'presence': int(block['hand_presence']),
+            'slots': slots,
+            'landmarks': block['landmarks'][slots],
+            'landmark_count': block['landmark_counts'][slots],
+            'palm_pos': block['palm_positions'][slots],
+            'palm_valid': block['palm_valid'][slots],
+            'finger_mask': block['finger_masks'][slots],
+            'finger_present': block['finger_present'][slots]
+        }
+
+    def _slot_plan(self, presence, current):
+        """Emplacement de référence comparé à chaque main courante
+
+        Retourne (emplacements (N, k), comparables (N, k), multiplicateurs
+        (N, k), nombre de mains en jeu (N,), meilleure main seule (N,)).
+        Une main seule est comparée à la même main de la référence, ou à
+        défaut à l'autre main avec la pénalité de mauvaise main. Avec deux
+        mains, une référence à une main est comparée aux deux mains courantes
+        (pénalité pour la mauvaise) et seule la meilleure compte : la main en
+        trop est ignorée. Une référence à deux mains compare chaque main à
+        son emplacement et le score est la moyenne sur les mains présentes
+        d'un côté ou de l'autre : une main manquante compte pour zéro.
+        """
+        presence = presence.astype(np.int64)
+        slots = current['slots']
+        n = len(presence)
+        if len(slots) == 1:
+            slot = int(slots[0])
+            same = ((presence >> slot) & 1).astype(bool)
+            other = ((presence >> (1 - slot)) & 1).astype(bool)
+            matched = np.where(same, slot, 1 - slot)[:, None]
+            valid = (same | other)[:, None]
+            multipliers = np.where(same, 1.0, self.wrong_hand_penalty)[:, None]
+            # Mauvaise main seule : même comptage que l'ancien score à une main
+            union = np.where(same, _POPCOUNT[presence | current['presence']], _POPCOUNT[presence])
+            best = np.zeros(n, dtype=bool)
+        else:
+            best = _POPCOUNT[presence] == 1
+            ref_slot = ((presence >> 1) & 1)[:, None]
+            matched = np.where(best[:, None], ref_slot, slots)
+            valid = best[:, None] | ((presence[:, None] >> slots) & 1).astype(bool)
+            multipliers = np.where(best[:, None] & (slots != ref_slot), self.wrong_hand_penalty, 1.0)
+            union = np.where(best, 1, _POPCOUNT[presence | current['presence']])
+        return matched, valid, multipliers, np.maximum(union, 1).astype(np.float32), best
+
+    @staticmethod
+    def _take_slots(array, matched):
+        """Colonnes (N, 2, ...) -> valeurs des emplacements choisis (N, k, ...)"""
+        if matched.shape[1] == HAND_SLOTS and (matched == np.arange(HAND_SLOTS)).all():
+            return array
+        if len(matched) and (matched == matched[0]).all():
+            # Même emplacement partout : vue sans copie
+            slot = int(matched[0, 0])
+            return array[:, slot:slot + 1]
+        return array[np.arange(len(array))[:, None], matched]
+
+    def _finger_scores(self, masks, present, current):
+        """Proportion de doigts dans le même état que la main courante"""
+        common = present & current['finger_present']
+        agree = ~(masks ^ current['finger_mask']) & common
+        total = _POPCOUNT[common].astype(np.float32)
+        return np.divide(
+            _POPCOUNT[agree].astype(np.float32), total,
+            out=np.zeros_like(total), where=total > 0
+        )
+
+    def _combine(self, slot_scores, valid, multipliers, union, best):
+        """Scores par main (N, k) -> score de la frame (N,)"""
+        weighted = slot_scores * valid * multipliers
+        return np.where(best, weighted.max(axis=1), weighted.sum(axis=1) / union).astype(np.float32)
+
+    def candidate_frames(self, current, threshold=None, snapshot=None):
+        """Sélectionne via l'index les frames pouvant atteindre le seuil"""
+        s = snapshot or self.snapshot
+        if not len(s.index_frames) or not len(current['slots']):
+            return np.zeros(0, dtype=np.int64)
+
+        # Le score des doigts et la pénalité de main ne dépendent que de la clé
+        matched, valid, multipliers, union, best = self._slot_plan(s.index_presence, current)
+        masks = self._take_slots(s.index_masks, matched)
+        present = self._take_slots(s.index_present, matched)
+        keep = valid.any(axis=1)
+        if self.max_finger_distance is not None:
+            common = present & current['finger_present']
+            distance = _POPCOUNT[(masks ^ current['finger_mask']) & common]
+            within = (distance <= self.max_finger_distance) | ~valid
+            # Référence à une main : une seule main courante doit être proche
+            keep &= np.where(best, (within & valid).any(axis=1), within.all(axis=1))
+
+        if threshold is not None:
+            # Score maximal atteignable : paume et landmarks parfaits
+            upper_bound = self._combine(
+                self.finger_weight * self._finger_scores(masks, present, current) +
+                self.palm_weight + self.landmark_weight,
+                valid, multipliers, union, best
+            )
+            keep &= upper_bound >= threshold
+
+        selected = [s.index_frames[k] for k in np.flatnonzero(keep)]
+        if not selected:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(selected)
+
+    def score_frames(self, features, frame_indices=None, current=None, snapshot=None):
+        """Calcule le score des mains courantes contre les frames de référence
+
+        Sans frame_indices, toutes les frames de la bibliothèque sont comparées.
+        Les deux mains sont comparées en une seule passe vectorisée ; seuls
+        les emplacements occupés par une main courante sont calculés.
+        """
+        s = snapshot or self.snapshot
+        if current is None:
+            current = self.encode(features)
+
+        if frame_indices is None:
+            columns = s.columns
+        else:
+            columns = {name: s.columns[name][frame_indices] for name in FRAME_COLUMNS}
+        if not len(current['slots']):
+            return np.zeros(len(columns['hand_presence']), dtype=np.float32)
+
+        matched, valid, multipliers, union, best = self._slot_plan(columns['hand_presence'], current)
+        landmarks = self._take_slots(columns['landmarks'], matched)
+        landmark_counts = self._take_slots(columns['landmark_counts'], matched)
+        palm_positions = self._take_slots(columns['palm_positions'], matched)
+        palm_valid = self._take_slots(columns['palm_valid'], matched)
+        finger_masks = self._take_slots(columns['finger_masks'], matched)
+        finger_present = self._take_slots(columns['finger_present'], matched)
+
+        # 1. Doigts (40%)
+        finger_scores = self._finger_scores(finger_masks, finger_present, current)
+
+        # 2. Paume (30%) : distance euclidienne ramenée à un score
+        palm_distances = np.linalg.norm(palm_positions - current['palm_pos'], axis=-1)
+        palm_scores = np.maximum(0, 1 - palm_distances / self.max_palm_distance)
+        palm_scores *= palm_valid & current['palm_valid']
+
+        # 3. Points de repère (30%) : distance moyenne sur les points communs
+        n_points = np.minimum(landmark_counts, current['landmark_count'])
+        point_distances = np.linalg.norm(landmarks - current['landmarks'], axis=-1)
+        point_distances *= np.arange(N_LANDMARKS) < n_points[..., None]
+        avg_distances = np.divide(
+            point_distances.sum(axis=-1), n_points,
+            out=np.ones(n_points.shape, dtype=np.float32), where=n_points > 0
+        )
+        landmark_scores = np.maximum(0, 1 - avg_distances)
+
+        scores = (
+            self.finger_weight * finger_scores +
+            self.palm_weight * palm_scores +
+            self.landmark_weight * landmark_scores
+        )
+        return self._combine(scores, valid, multipliers, union, best)
+
+    def score_gestures(self, features, snapshot=None):
+        """Retourne le meilleur score de chaque geste (même ordre que snapshot.names)"""
+        s = snapshot or self.snapshot
+        if not s.names:
+            return np.zeros(0, dtype=np.float32)
+        return np.maximum.reduceat(self.score_frames(features, snapshot=s), s.offsets)
+
+    def match(self, features, threshold):
+        """Retourne les gestes dont le score atteint le seuil"""
+        s = self.snapshot
+        if not s.names:
+            return []
+
+        current = self.encode(features)
+        candidates = None
+        if self.use_neighbor_index:
+            candidates = s.neighbor_index.query(current, s)
+        if candidates is None and self.use_finger_index:
+            candidates = self.candidate_frames(current, threshold, s)
+
+        if candidates is not None:
+            scores = np.zeros(len(s.names), dtype=np.float32)
+            np.maximum.at(
+                scores, s.frame_gesture[candidates],
+                self.score_frames(features, candidates, current, s)
+            )
+        else:
+            scores = self.score_gestures(features, s)
+
+        # À score égal, les gestes à deux mains d'abord : une référence à une
+        # main ignore la main en trop et ne doit pas masquer le geste complet
+        matched = np.flatnonzero(scores >= threshold)
+        matched = matched[np.lexsort((-s.gesture_hands[matched].astype(np.int64), -scores[matched]))]
+        return [(s.names[i], float(scores[i])) for i in matched]
@@ -0,0 +1,578 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from gesture_matcher import FRAME_COLUMNS, empty_columns, encode_sequence
+from hand_frame import (
+    FINGER_NAMES, HAND_SLOTS, HANDEDNESS_CODES, LEFT_SLOT, N_LANDMARKS, RIGHT_SLOT, HandFrame, hand_slots
+)
+
+# Version 2 : deux emplacements de main (gauche, droite) par frame
+FORMAT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+
+# Colonnes conservées sur disque en plus de celles du moteur de correspondance
+EXTRA_COLUMNS = {
+    'finger_angles': (np.float32, (HAND_SLOTS, len(FINGER_NAMES))),
+    'frame_times': (np.float64, ()),
+}
+STORE_COLUMNS = dict(FRAME_COLUMNS, **EXTRA_COLUMNS)
+
+# Colonnes du format 1 (une seule main par frame)
+V1_COLUMNS = {
+    'landmarks': (np.float32, (N_LANDMARKS, 3)),
+    'landmark_counts': (np.int32, ()),
+    'palm_positions': (np.float32, (3,)),
+    'palm_valid': (bool, ()),
+    'finger_masks': (np.uint8, ()),
+    'finger_present': (np.uint8, ()),
+    'handedness': (np.int8, ()),
+    'finger_angles': (np.float32, (len(FINGER_NAMES),)),
+    'frame_times': (np.float64, ()),
+}
+
+
+def _encode_extra_columns(sequence):
+    """Encode les angles des doigts et les temps des frames d'une séquence"""
+    frames = [frame for frame in map(HandFrame.coerce, sequence) if frame is not None]
+    finger_angles = np.zeros((len(frames), HAND_SLOTS, len(FINGER_NAMES)), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        for slot, hand in enumerate(hand_slots(frame)):
+            if hand is not None:
+                finger_angles[i, slot] = hand.finger_angles
+    return {
+        'finger_angles': finger_angles,
+        'frame_times': np.array([frame.time for frame in frames], dtype=np.float64),
+    }
+
+
+def upgrade_columns(columns):
+    """Convertit des colonnes du format 1 vers les emplacements de main du format 2
+
+    La main de chaque frame est placée à gauche ou à droite selon la main
+    utilisée (côté inconnu : à droite, comme pour les mains détectées).
+    """
+    n = len(columns['landmark_counts'])
+    upgraded = empty_columns(STORE_COLUMNS, n)
+    rows = np.arange(n)
+    slots = np.where(np.asarray(columns['handedness']) == HANDEDNESS_CODES['Left'], LEFT_SLOT, RIGHT_SLOT)
+    for name in STORE_COLUMNS:
+        if name == 'hand_presence':
+            upgraded[name][:] = 1 << slots
+        elif name == 'frame_times':
+            upgraded[name][:] = columns[name]
+        else:
+            upgraded[name][rows, slots] = columns[name]
+    return upgraded
+
+
+def encode_stored_sequence(sequence):
+    """Encode une séquence avec toutes les colonnes du format binaire"""
+    if isinstance(sequence, StoredSequence):
+        return sequence.columns()
+    columns = encode_sequence(sequence)
+    columns.update(_encode_extra_columns(sequence))
+    return columns
+
+
+class StoredSequence:
+    """Séquence de frames adossée aux tableaux de la bibliothèque binaire
+
+    Les frames (HandFrame) sont des vues sur les tableaux, créées
+    uniquement à l'accès.
+    """
+
+    def __init__(self, columns, offset, length):
+        self._columns = columns
+        self.offset = offset
+        self.length = length
+
+    def columns(self):
+        """Vues (sans copie) sur les colonnes de cette séquence"""
+        return {
+            name: array[self.offset:self.offset + self.length]
+            for name, array in self._columns.items()
+        }
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.length))]
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        row = self.offset + i
+        presence = int(self._columns['hand_presence'][row])
+        # Main principale : la droite si présente, la gauche dans frame.other
+        if presence & (1 << RIGHT_SLOT):
+            frame = self._hand(row, RIGHT_SLOT)
+            if presence & (1 << LEFT_SLOT):
+                frame.other = self._hand(row, LEFT_SLOT)
+            return frame
+        return self._hand(row, LEFT_SLOT)
+
+    def _hand(self, row, slot):
+        """Main d'un emplacement d'une frame"""
+        c = self._columns
+        return HandFrame(
+            c['landmarks'][row, slot],
+            finger_mask=int(c['finger_masks'][row, slot]),
+            finger_present=int(c['finger_present'][row, slot]),
+            palm=c['palm_positions'][row, slot],
+            handedness_code=HANDEDNESS_CODES['Left'] if slot == LEFT_SLOT else HANDEDNESS_CODES['Right'],
+            finger_angles=c['finger_angles'][row, slot],
+            palm_valid=bool(c['palm_valid'][row, slot]),
+            landmark_count=int(c['landmark_counts'][row, slot]),
+            time=float(c['frame_times'][row])
+        )
+
+
+class GestureStore:
+    """Bibliothèque de gestes au format binaire
+
+    Un petit manifeste JSON (noms, dates, positions) accompagne un fichier
+    .npy par colonne, ouvert en mémoire partagée (np.load(mmap_mode='r')) :
+    le chargement est quasi instantané et les tableaux sont passés tels
+    quels au GestureMatcher.
+
+    Les modifications (ajout, suppression) sont écrites par un thread en
+    arrière-plan dans un journal en ajout seul, compacté périodiquement en
+    une nouvelle génération de fichiers. Chaque écriture est atomique
+    (fichier temporaire puis renommage).
+    """
+
+    def __init__(self, directory="gesture_library", compact_every=32):
+        self.directory = directory
+        self.manifest_file = os.path.join(directory, "manifest.json")
+        self.journal_file = os.path.join(directory, "journal.jsonl")
+        # Nombre d'opérations du journal avant compaction
+        self.compact_every = compact_every
+
+        # État de la bibliothèque tel qu'écrit sur disque (géré par le thread d'écriture)
+        self._gestures = {}
+        self._journal_ops = 0
+        self._segment_counter = 0
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+        # Bibliothèque présente mais illisible : plus aucune écriture, pour ne
+        # pas la remplacer par les seuls gestes de cette exécution
+        self.load_failed = False
+
+    def exists(self):
+        """Indique si une bibliothèque binaire est présente"""
+        return os.path.exists(self.manifest_file) or os.path.exists(self.journal_file)
+
+    def _column_file(self, name, generation):
+        return os.path.join(self.directory, f"{name}-{generation}.npy")
+
+    def read_manifest(self):
+        """Lit le manifeste de la bibliothèque"""
+        with open(self.manifest_file, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Version de bibliothèque non supportée: {manifest.get('version')}")
+        return manifest
+
+    def _manifest_version(self):
+        """Version du manifeste présent (None s'il n'y en a pas)"""
+        if not os.path.exists(self.manifest_file):
+            return None
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f).get('version')
+        except Exception:
+            return None
+
+    def _current_generation(self):
+        if not os.path.exists(self.manifest_file):
+            return 0
+        try:
+            return self.read_manifest()['generation']
+        except Exception:
+            return 0
+
+    def load(self):
+        """Charge la bibliothèque : retourne (gestes, colonnes en mémoire partagée)
+
+        Une bibliothèque au format 1 est convertie en mémoire (sans mémoire
+        partagée) ; load_gestures la réécrit ensuite au format courant.
+        """
+        if not os.path.exists(self.manifest_file):
+            return [], {
+                name: np.zeros((0,) + shape, dtype=dtype)
+                for name, (dtype, shape) in STORE_COLUMNS.items()
+            }
+
+        manifest = self.read_manifest()
+        generation = manifest['generation']
+        frame_count = manifest['frame_count']
+        outdated = manifest['version'] != FORMAT_VERSION
+
+        columns = {}
+        for name, (dtype, shape) in (V1_COLUMNS if outdated else STORE_COLUMNS).items():
+            if frame_count:
+                array = np.load(self._column_file(name, generation), mmap_mode='r')
+            else:
+                array = np.zeros((0,) + shape, dtype=dtype)
+            if array.dtype != np.dtype(dtype) or array.shape != (frame_count,) + shape:
+                raise ValueError(f"Colonne '{name}' invalide dans la bibliothèque")
+            columns[name] = array
+
+        if outdated:
+            columns = upgrade_columns(columns)
+        return manifest['gestures'], columns
+
+    def load_gestures(self):
+        """Charge la bibliothèque sous la forme attendue par SignTranslator
+
+        Retourne (gestes, colonnes). Les colonnes (noms, longueurs, tableaux)
+        ne sont fournies que si le journal est vide : elles peuvent alors être
+        passées sans copie au GestureMatcher.
+        """
+        self.flush()
+        try:
+            # Anciennes générations qui n'avaient pas pu être supprimées
+            self._sweep_generations()
+            outdated = self._manifest_version() not in (None, FORMAT_VERSION)
+            entries, columns = self.load()
+        except Exception:
+            self.load_failed = True
+            raise
+        custom_gestures = {
+            entry['name']: {
+                'sequence': StoredSequence(columns, entry['offset'], entry['length']),
+                'timestamp': entry['timestamp']
+            }
+            for entry in entries
+        }
+
+        journal_ops = self._replay_journal(custom_gestures)
+        with self._lock:
+            self._gestures = dict(custom_gestures)
+            self._journal_ops = journal_ops
+
+        if outdated:
+            # Réécriture au format courant en arrière-plan
+            print("Conversion de la bibliothèque de gestes au nouveau format...")
+            self.save_async(custom_gestures)
+
+        if journal_ops:
+            return custom_gestures, None
+        names = [entry['name'] for entry in entries]
+        lengths = [entry['length'] for entry in entries]
+        return custom_gestures, (names, lengths, columns)
+
+    def _replay_journal(self, custom_gestures):
+        """Applique les opérations du journal aux gestes chargés"""
+        if not os.path.exists(self.journal_file):
+            return 0
+        ops = 0
+        with open(self.journal_file, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Ligne incomplète (arrêt pendant l'écriture) : ignorée
+                    continue
+                ops += 1
+                op = entry.get('op')
+                if op == 'add':
+                    try:
+                        with np.load(os.path.join(self.directory, entry['segment'])) as segment:
+                            if 'hand_presence' in segment:
+                                columns = {name: segment[name] for name in STORE_COLUMNS}
+                            else:  # Segment écrit au format 1
+                                columns = upgrade_columns({name: segment[name] for name in V1_COLUMNS})
+                    except Exception as e:
+                        print(f"Segment du journal illisible ({entry.get('segment')}): {str(e)}")
+                        continue
+                    custom_gestures.pop(entry['name'], None)
+                    custom_gestures[entry['name']] = {
+                        'sequence': StoredSequence(columns, 0, len(columns['hand_presence'])),
+                        'timestamp': entry.get('timestamp', time.time())
+                    }
+                    self._segment_counter = max(self._segment_counter, entry.get('counter', 0) + 1)
+                elif op == 'delete':
+                    custom_gestures.pop(entry['name'], None)
+                elif op == 'clear':
+                    custom_gestures.clear()
+        return ops
+
+    # --- Écriture en arrière-plan ---
+
+    def record_add(self, gesture_name, gesture_data):
+        """Enregistre l'ajout (ou le remplacement) d'un geste"""
+        self._submit(('add', gesture_name, gesture_data))
+
+    def record_delete(self, gesture_name):
+        """Enregistre la suppression d'un geste"""
+        self._submit(('delete', gesture_name))
+
+    def record_clear(self):
+        """Enregistre la suppression de tous les gestes"""
+        self._submit(('clear',))
+
+    def save_async(self, custom_gestures):
+        """Réécrit toute la bibliothèque en arrière-plan"""
+        self._submit(('save', dict(custom_gestures)))
+
+    def _submit(self, operation):
+        if self.load_failed:
+            print("Bibliothèque de gestes illisible : modification non enregistrée sur disque")
+            return
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_worker, daemon=True)
+            self._writer.start()
+        self._queue.put(operation)
+
+    def flush(self):
+        """Attend la fin des écritures en attente"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Termine les écritures et compacte le journal"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(('compact',))
+            self._queue.put(None)
+            self._writer.join()
+        self._writer = None
+        if not self.load_failed:
+            self._sweep_generations()
+
+    def _writer_worker(self):
+        """Thread d'écriture de la bibliothèque"""
+        while True:
+            operation = self._queue.get()
+            try:
+                if operation is None:
+                    return
+                with self._lock:
+                    self._apply(operation)
+            except Exception as e:
+                print(f"Erreur lors de l'écriture de la bibliothèque de gestes: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _apply(self, operation):
+        op = operation[0]
+        if op == 'save':
+            self._gestures = operation[1]
+            self._compact()
+            return
+        if op == 'compact':
+            if self._journal_ops:
+                self._compact()
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        if op == 'add':
+            _, gesture_name, gesture_data = operation
+            columns = encode_stored_sequence(gesture_data.get('sequence', []))
+            timestamp = gesture_data.get('timestamp', gesture_data.get('time', time.time()))
+            counter = self._segment_counter
+            self._segment_counter += 1
+            segment = f"segment-{counter}.npz"
+            self._atomic_write(
+                os.path.join(self.directory, segment),
+                lambda f: np.savez(f, **{name: np.asarray(columns[name]) for name in STORE_COLUMNS})
+            )
+            self._append_journal({
+                'op': 'add', 'name': gesture_name, 'timestamp': timestamp,
+                'segment': segment, 'counter': counter
+            })
+            self._gestures.pop(gesture_name, None)
+            self._gestures[gesture_name] = {
+                'sequence': StoredSequence(columns, 0, len(columns['hand_presence'])),
+                'timestamp': timestamp
+            }
+        elif op == 'delete':
+            self._append_journal({'op': 'delete', 'name': operation[1]})
+            self._gestures.pop(operation[1], None)
+        elif op == 'clear':
+            self._append_journal({'op': 'clear'})
+            self._gestures = {}
+
+        if self._journal_ops >= self.compact_every:
+            self._compact()
+
+    def _append_journal(self, entry):
+        """Ajoute une opération à la fin du journal"""
+        with open(self.journal_file, 'a+b') as f:
+            # Terminer une éventuelle ligne incomplète laissée par un arrêt brutal
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write((json.dumps(entry) + "\n").encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_ops += 1
+
+    def _atomic_write(self, path, write):
+        """Écrit un fichier via un fichier temporaire puis un renommage atomique"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _compact(self):
+        """Écrit une nouvelle génération complète et vide le journal"""
+        self._write_generation(self._gestures)
+
+        # Le manifeste inclut désormais toutes les opérations du journal
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self._journal_ops = 0
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith("segment-"):
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except OSError:
+                    pass
+
+    def compact(self):
+        """Compacte immédiatement le journal (sans effet s'il est vide)"""
+        if self.load_failed:
+            return
+        self.flush()
+        with self._lock:
+            if self._journal_ops:
+                self._compact()
+
+    def save(self, custom_gestures):
+        """Écrit immédiatement toute la bibliothèque (remplace le journal)"""
+        if self.load_failed:
+            raise RuntimeError("Bibliothèque de gestes illisible : écriture refusée")
+        self.flush()
+        with self._lock:
+            self._gestures = dict(custom_gestures)
+            self._compact()
+
+    def _write_generation(self, custom_gestures):
+        """Écrit toute la bibliothèque dans une nouvelle génération de fichiers"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        generation = self._current_generation() + 1
+
+        entries = []
+        parts = []
+        offset = 0
+        for gesture_name, gesture_data in custom_gestures.items():
+            columns = encode_stored_sequence(gesture_data.get('sequence', []))
+            length = len(columns['hand_presence'])
+            if not length:
+                continue
+            entries.append({
+                'name': gesture_name,
+                'timestamp': gesture_data.get('timestamp', gesture_data.get('time', time.time())),
+                'offset': offset,
+                'length': length
+            })
+            parts.append(columns)
+            offset += length
+
+        if offset:
+            for name, (dtype, shape) in STORE_COLUMNS.items():
+                array = np.concatenate([part[name] for part in parts]).astype(dtype, copy=False)
+                self._atomic_write(
+                    self._column_file(name, generation),
+                    lambda f, array=array: np.save(f, np.ascontiguousarray(array))
+                )
+
+        manifest = {
+            'version': FORMAT_VERSION,
+            'generation': generation,
+            'frame_count': offset,
+            'landmarks_per_frame': N_LANDMARKS,
+            'gestures': entries
+        }
+        # Le renommage du manifeste valide la nouvelle génération
+        self._atomic_write(
+            self.manifest_file,
+            lambda f: f.write(json.dumps(manifest, indent=2).encode('utf-8'))
+        )
+
+        self._sweep_generations(generation)
+
+    def _sweep_generations(self, keep=None):
+        """Supprime les fichiers de colonnes des générations autres que keep
+
+        keep : génération du manifeste par défaut. Un fichier encore ouvert en
+        mémoire partagée (Windows) ne peut pas être supprimé : il le sera au
+        prochain chargement ou à la fermeture.
+        """
+        if keep is None:
+            if os.path.exists(self.manifest_file):
+                try:
+                    keep = self.read_manifest()['generation']
+                except Exception:
+                    # Manifeste illisible : ne rien supprimer
+                    return
+            else:
+                keep = 0
+        if not os.path.isdir(self.directory):
+            return
+        names = set(STORE_COLUMNS) | set(V1_COLUMNS)
+        for file_name in os.listdir(self.directory):
+            name, _, generation = file_name[:-len(".npy")].rpartition("-")
+            if not file_name.endswith(".npy") or name not in names or not generation.isdigit():
+                continue
+            if int(generation) == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, file_name))
+            except OSError:
+                # Encore ouvert en mémoire partagée (Windows)
+                pass
+
+    def migrate_from_json(self, json_file, convert_frame=None):
+        """Convertit une bibliothèque custom_gestures.json au format binaire"""
+        with open(json_file, 'r') as f:
+            data = json.load(f)
+        custom_gestures = {}
+        for name, gesture_data in data.items():
+            if not isinstance(gesture_data, dict) or not gesture_data.get('sequence'):
+                continue
+            sequence = gesture_data['sequence']
+            if convert_frame is not None:
+                sequence = [frame for frame in map(convert_frame, sequence) if frame]
+            custom_gestures[name] = {
+                'sequence': sequence,
+                'timestamp': gesture_data.get('timestamp', time.time())
+            }
+        self.save(custom_gestures)
+        return len(custom_gestures)
+
+    def export_json(self, json_file, custom_gestures=None):
+        """Exporte la bibliothèque au format JSON (portable)"""
+        if custom_gestures is None:
+            custom_gestures = self.load_gestures()[0]
+        data = {
+            name: {
+                'sequence': [
+                    frame.to_dict()
+                    for frame in map(HandFrame.coerce, gesture_data.get('sequence', []))
+                    if frame is not None
+                ],
+                'timestamp': gesture_data.get('timestamp', time.time())
+            }
+            for name, gesture_data in custom_gestures.items()
+        }
+        with open(json_file, 'w') as f:
+            json.dump(data, f)
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import simpledialog, filedialog, messagebox, ttk
 from PIL import Image, ImageTk, ImageDraw, ImageFont
 import cv2
+import numpy as np
 import os
 import time
 from translations import Translator
@@ -18,6 +19,13 @@ class GUI:
         self.current_subtitle = ""
         self.subtitle_start_time = 0
         self.subtitle_duration = 3.0
+        
+        # Rendu de la vidéo : image Tk réutilisée, police et sous-titre en cache
+        self.max_width = 640
+        self.photo = None
+        self.last_frame_seq = None
+        self.fonts = {}
+        self.subtitle_cache = None  # ((texte, largeur, hauteur), image, position)
 
         # Créer la barre de menu
         menubar = tk.Menu(root)
@@ -204,8 +212,8 @@ class GUI:
                 self.translator.get_text('delete_confirmation'),
                 icon='warning'
             )
-            if result:
-                self.remove_gesture_callback()
+            # Confirmation affichée seulement si la suppression a eu lieu
+            if result and self.remove_gesture_callback():
                 messagebox.showinfo(
                     self.translator.get_text('deletion'),
                     self.translator.get_text('deletion_success')
@@ -235,73 +243,90 @@ class GUI:
         self.current_subtitle = text
         self.subtitle_start_time = time.time()
 
-    def update_frame(self, frame):
-        """Met à jour l'image de la caméra"""
-        if frame is not None:
-            # Convertir le frame en image PIL
-            image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            
-            # Redimensionner l'image si nécessaire
-            max_width = 640
-            if image.width > max_width:
-                ratio = max_width / image.width
-                new_size = (max_width, int(image.height * ratio))
-                image = image.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # Créer un objet Draw pour l'image redimensionnée
-            draw = ImageDraw.Draw(image)
-            
-            # Ajouter les sous-titres si nécessaires
-            current_time = time.time()
-            time_since_subtitle = current_time - self.subtitle_start_time
-            
-            if self.current_subtitle and time_since_subtitle < self.subtitle_duration:
-                print(f"Affichage du sous-titre : {self.current_subtitle} (temps écoulé : {time_since_subtitle:.1f}s)")
-                try:
-                    # Calculer la position des sous-titres (en bas de l'image)
-                    img_width, img_height = image.size
-                    font_size = min(36, img_height // 10)  # Ajuster la taille de la police en fonction de l'image
-                    
-                    try:
-                        font = ImageFont.truetype("arial.ttf", font_size)
-                    except OSError:
-                        # Si arial n'est pas disponible, utiliser une police par défaut
-                        print("Police Arial non trouvée, utilisation d'une police par défaut")
-                        font = ImageFont.load_default()
-                    
-                    # Créer un fond semi-transparent pour les sous-titres
-                    text_bbox = draw.textbbox((0, 0), self.current_subtitle, font=font)
-                    text_width = text_bbox[2] - text_bbox[0]
-                    text_height = text_bbox[3] - text_bbox[1]
-                    text_x = (img_width - text_width) // 2
-                    text_y = img_height - text_height - 40  # Un peu plus haut pour être plus visible
-                    
-                    # Dessiner le fond semi-transparent
-                    padding = 20
-                    draw.rectangle(
-                        [
-                            text_x - padding,
-                            text_y - padding,
-                            text_x + text_width + padding,
-                            text_y + text_height + padding
-                        ],
-                        fill=(0, 0, 0, 180)  # Fond plus opaque
-                    )
-                    
-                    # Dessiner le texte
-                    draw.text(
-                        (text_x, text_y),
-                        self.current_subtitle,
-                        font=font,
-                        fill=(255, 255, 255)  # Texte blanc
-                    )
-                except Exception as e:
-                    print(f"Erreur lors de l'affichage des sous-titres : {str(e)}")
-            
-            # Convertir en format pour tkinter
-            photo = ImageTk.PhotoImage(image=image)
-            self.video_label.configure(image=photo)
-            self.video_label.image = photo
+    def update_frame(self, frame, seq=None):
+        """Met à jour l'image de la caméra
+
+        seq : numéro de séquence de la frame ; une frame déjà affichée
+        n'est pas redessinée.
+        """
+        if frame is None:
+            return
+        if seq is not None and seq == self.last_frame_seq:
+            return
+        self.last_frame_seq = seq
+        
+        # Redimensionner si nécessaire, avant la conversion (moins de pixels)
+        height, width = frame.shape[:2]
+        if width > self.max_width:
+            new_size = (self.max_width, int(height * self.max_width / width))
+            frame = cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        
+        # Ajouter les sous-titres si nécessaires
+        if self.current_subtitle and time.time() - self.subtitle_start_time < self.subtitle_duration:
+            try:
+                self._draw_subtitle(rgb)
+            except Exception as e:
+                print(f"Erreur lors de l'affichage des sous-titres : {str(e)}")
+        
+        # Réutiliser l'image Tk tant que la taille ne change pas
+        image = Image.fromarray(rgb)
+        if self.photo is not None and (self.photo.width(), self.photo.height()) == image.size:
+            self.photo.paste(image)
+        else:
+            self.photo = ImageTk.PhotoImage(image=image)
+            self.video_label.configure(image=self.photo)
+            self.video_label.image = self.photo
+    
+    def _get_font(self, font_size):
+        """Police des sous-titres (chargée une seule fois par taille)"""
+        font = self.fonts.get(font_size)
+        if font is None:
+            try:
+                font = ImageFont.truetype("arial.ttf", font_size)
+            except OSError:
+                # Si arial n'est pas disponible, utiliser une police par défaut
+                if not self.fonts:
+                    print("Police Arial non trouvée, utilisation d'une police par défaut")
+                font = ImageFont.load_default()
+            self.fonts[font_size] = font
+        return font
+    
+    def _render_subtitle(self, text, img_width, img_height):
+        """Dessine le sous-titre (fond noir, texte blanc) et calcule sa position"""
+        font_size = min(36, img_height // 10)  # Ajuster la taille de la police en fonction de l'image
+        font = self._get_font(font_size)
+        
+        text_bbox = ImageDraw.Draw(Image.new('RGB', (1, 1))).textbbox((0, 0), text, font=font)
+        text_width = text_bbox[2] - text_bbox[0]
+        text_height = text_bbox[3] - text_bbox[1]
+        text_x = (img_width - text_width) // 2
+        text_y = img_height - text_height - 40  # Un peu plus haut pour être plus visible
+        
+        padding = 20
+        bitmap = Image.new('RGB', (text_width + 2 * padding + 1, text_height + 2 * padding + 1), (0, 0, 0))
+        ImageDraw.Draw(bitmap).text(
+            (padding - text_bbox[0], padding - text_bbox[1]),
+            text,
+            font=font,
+            fill=(255, 255, 255)  # Texte blanc
+        )
+        return np.asarray(bitmap), (text_x - padding, text_y - padding)
+    
+    def _draw_subtitle(self, rgb):
+        """Copie le sous-titre (rendu une seule fois par texte) en bas de l'image"""
+        img_height, img_width = rgb.shape[:2]
+        key = (self.current_subtitle, img_width, img_height)
+        if self.subtitle_cache is None or self.subtitle_cache[0] != key:
+            self.subtitle_cache = (key,) + self._render_subtitle(*key)
+        _, bitmap, (x, y) = self.subtitle_cache
+        
+        # Partie visible du sous-titre (texte plus large que l'image)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1 = min(x + bitmap.shape[1], img_width)
+        y1 = min(y + bitmap.shape[0], img_height)
+        if x1 > x0 and y1 > y0:
+            rgb[y0:y1, x0:x1] = bitmap[y0 - y:y1 - y, x0 - x:x1 - x]
 
     def update_translation(self, text):
         """Met à jour le texte dans la zone de traduction"""
@@ -386,6 +411,10 @@ class GUI:
 
     def show_delete_specific_dialog(self):
         """Affiche une fenêtre de dialogue pour supprimer un geste spécifique"""
+        if self.app.sign_translator is None:
+            messagebox.showinfo("Information", "Chargement en cours...")
+            return
+        
         # Récupérer la liste des gestes personnalisés et prédéfinis
         custom_gestures = self.app.sign_translator.get_custom_gestures()
         predefined_gestures = list(self.app.sign_translator.gestures.keys())
@@ -1,148 +1,319 @@
 import mediapipe as mp
 import cv2
 import numpy as np
+import threading
+import time
+from hand_frame import bounding_boxes, encode_handedness, hand_frames_from_landmarks
+
+
+def landmarks_to_array(landmarks):
+    """Points de repère MediaPipe -> tableau (21, 3) en une seule conversion"""
+    return np.array([(landmark.x, landmark.y, landmark.z) for landmark in landmarks], dtype=np.float32)
+
+
+class LegacyHandsBackend:
+    """Ancienne API synchrone mp.solutions.hands.Hands"""
+
+    synchronous = True
+
+    def __init__(self, max_num_hands=2, model_complexity=1, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, **unused):
+        self.options = {
+            'max_num_hands': max_num_hands,
+            'model_complexity': model_complexity,  # 0 : modèle léger, 1 : modèle complet
+            'min_detection_confidence': min_detection_confidence,
+            'min_tracking_confidence': min_tracking_confidence
+        }
+        self.hands = mp.solutions.hands.Hands(**self.options)
+
+    def process(self, rgb_frame, timestamp_ms):
+        """Retourne [(points de repère (21, 3), main, score)] pour l'image RGB"""
+        results = self.hands.process(rgb_frame)
+        if not results.multi_hand_landmarks:
+            return []
+        return [
+            (landmarks_to_array(hand_landmarks.landmark),
+             handedness.classification[0].label, handedness.classification[0].score)
+            for hand_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness)
+        ]
+
+    def reset(self):
+        pass
+
+    def clone(self):
+        """Nouvelle instance avec les mêmes réglages (suivi indépendant)"""
+        return LegacyHandsBackend(**self.options)
+
+    def close(self):
+        self.hands.close()
+
+
+class TasksHandsBackend:
+    """HandLandmarker de MediaPipe Tasks en mode VIDEO (synchrone, horodaté)
+
+    model_asset_path : modèle .task (téléchargé séparément, par exemple
+    hand_landmarker.task). delegate : 'cpu' ou 'gpu'.
+    """
+
+    synchronous = True
+    running_mode = 'VIDEO'
+
+    def __init__(self, max_num_hands=2, model_asset_path='hand_landmarker.task', delegate='cpu',
+                 min_detection_confidence=0.5, min_presence_confidence=0.5,
+                 min_tracking_confidence=0.5, **unused):
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python import vision
+
+        self.options = {
+            'max_num_hands': max_num_hands,
+            'model_asset_path': model_asset_path,
+            'delegate': delegate,
+            'min_detection_confidence': min_detection_confidence,
+            'min_presence_confidence': min_presence_confidence,
+            'min_tracking_confidence': min_tracking_confidence
+        }
+        delegates = {'cpu': BaseOptions.Delegate.CPU, 'gpu': BaseOptions.Delegate.GPU}
+        landmarker_options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_asset_path, delegate=delegates[delegate]),
+            running_mode=getattr(vision.RunningMode, self.running_mode),
+            num_hands=max_num_hands,
+            min_hand_detection_confidence=min_detection_confidence,
+            min_hand_presence_confidence=min_presence_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+            **self._callback_options()
+        )
+        self.landmarker = vision.HandLandmarker.create_from_options(landmarker_options)
+        self.last_timestamp_ms = -1
+        self.timestamp_offset = 0
+        self.discontinuity = False
+
+    def _callback_options(self):
+        return {}
+
+    def _next_timestamp(self, timestamp_ms):
+        """Horodatages strictement croissants exigés par MediaPipe Tasks"""
+        if self.discontinuity:
+            # Nouvelle vidéo ou nouveau segment : décalage pour rester croissant
+            self.timestamp_offset = self.last_timestamp_ms + 1000 - timestamp_ms
+            self.discontinuity = False
+        timestamp_ms += self.timestamp_offset
+        if timestamp_ms <= self.last_timestamp_ms:
+            timestamp_ms = self.last_timestamp_ms + 1
+        self.last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def _convert(self, result):
+        """Résultat Tasks -> même format que l'ancienne API"""
+        if result is None or not result.hand_landmarks:
+            return []
+        return [
+            (landmarks_to_array(landmarks), handedness[0].category_name, handedness[0].score)
+            for landmarks, handedness in zip(result.hand_landmarks, result.handedness)
+        ]
+
+    def process(self, rgb_frame, timestamp_ms):
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb_frame))
+        result = self.landmarker.detect_for_video(image, self._next_timestamp(timestamp_ms))
+        return self._convert(result)
+
+    def reset(self):
+        self.discontinuity = True
+
+    def clone(self):
+        return type(self)(**self.options)
+
+    def close(self):
+        self.landmarker.close()
+
+
+class TasksLiveStreamBackend(TasksHandsBackend):
+    """HandLandmarker en mode LIVE_STREAM (asynchrone, pour la caméra)
+
+    process() envoie la frame au modèle sans attendre et retourne le dernier
+    résultat disponible : la détection se fait en parallèle de la capture
+    et de l'affichage, avec une frame de retard environ.
+    """
+
+    synchronous = False
+    running_mode = 'LIVE_STREAM'
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._latest = []
+        super().__init__(**options)
+
+    def _callback_options(self):
+        return {'result_callback': self._on_result}
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        hands = self._convert(result)
+        with self._lock:
+            self._latest = hands
+
+    def process(self, rgb_frame, timestamp_ms):
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb_frame))
+        self.landmarker.detect_async(image, self._next_timestamp(timestamp_ms))
+        with self._lock:
+            return self._latest
+
+    def reset(self):
+        super().reset()
+        with self._lock:
+            self._latest = []
+
+
+# Nom -> classe du moteur de détection
+DETECTOR_BACKENDS = {
+    'legacy': LegacyHandsBackend,
+    'video': TasksHandsBackend,
+    'live_stream': TasksLiveStreamBackend,
+}
+
 
 class HandDetector:
-    def __init__(self):
-        """Initialisation simple du détecteur de main"""
-        self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
+    def __init__(self, roi_mode=False, roi_padding=0.3, roi_min_size=0.25, roi_refresh_interval=30,
+                 backend='legacy', model_complexity=1, model_asset_path='hand_landmarker.task',
+                 delegate='cpu', num_threads=None):
+        """Initialisation simple du détecteur de main
+
+        roi_mode : ne traiter que la région autour des mains de la frame
+        précédente (moins de pixels par inférence). La frame entière est
+        analysée si le suivi est perdu ou toutes les roi_refresh_interval
+        frames (nouvelle main entrant dans le champ).
+        backend : 'legacy' (mp.solutions.hands), 'video' (HandLandmarker,
+        fichiers) ou 'live_stream' (HandLandmarker asynchrone, caméra).
+        model_complexity (legacy) ou model_asset_path et delegate (Tasks)
+        choisissent le modèle. num_threads limite les threads d'OpenCV
+        (MediaPipe ne permet pas de régler ceux de l'inférence).
+        """
+        if num_threads is not None:
+            cv2.setNumThreads(num_threads)
         
-        # Configuration basique
-        self.hands = self.mp_hands.Hands(
+        # Moteur de détection
+        if backend not in DETECTOR_BACKENDS:
+            raise ValueError(f"Moteur de détection inconnu: {backend}")
+        self.backend = DETECTOR_BACKENDS[backend](
             max_num_hands=2,                # Deux mains
+            model_complexity=model_complexity,
+            model_asset_path=model_asset_path,
+            delegate=delegate,
             min_detection_confidence=0.5,    # Seuil de détection
             min_tracking_confidence=0.5      # Seuil de suivi
         )
         
-        # Points des doigts
-        self.FINGER_TIPS = [4, 8, 12, 16, 20]  # Bout des doigts
-        self.FINGER_BASES = [2, 5, 9, 13, 17]  # Base des doigts
-
-    def detect_hands(self, frame):
-        """Détection des deux mains"""
-        # Conversion en RGB pour MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Détection
-        results = self.hands.process(rgb_frame)
-        
-        # Si pas de main détectée
-        if not results.multi_hand_landmarks:
+        # Mode région d'intérêt (résultats synchrones uniquement : les
+        # points doivent correspondre à la région de la frame envoyée)
+        self.roi_mode = roi_mode and self.backend.synchronous
+        self.roi_padding = roi_padding  # Marge autour des mains (proportion de la boîte)
+        self.roi_min_size = roi_min_size  # Taille minimale de la région (proportion de la frame)
+        self.roi_refresh_interval = roi_refresh_interval
+        self.roi_backend = None  # Instance séparée : le suivi de la frame entière reste cohérent
+        self.roi = None  # Boîte (x0, y0, x1, y1) en pixels, ou None
+        self.frames_since_full = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def detect_hands(self, frame, timestamp=None):
+        """Détection des deux mains
+
+        timestamp : instant de la frame en secondes (horodatage exigé par
+        les modes VIDEO et LIVE_STREAM ; heure actuelle par défaut).
+        Retourne une liste de HandFrame, ou None si aucune main n'est détectée.
+        La frame n'est pas modifiée : le dessin est fait par OverlayRenderer.
+        """
+        hands = self._detect(frame, timestamp)
+        if not hands:
             return None
-            
-        hands_info = []
-        
-        # Pour chaque main détectée
-        for hand_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
-            # Dessiner les points et connexions
-            self._draw_hand(frame, hand_landmarks)
-            
-            # Compter les doigts levés
-            fingers = self._count_fingers(hand_landmarks)
-            
-            # Information de la main
-            hand_info = {
-                'landmarks': [[landmark.x, landmark.y, landmark.z] for landmark in hand_landmarks.landmark],
-                'handedness': handedness.classification[0].label,
-                'confidence': handedness.classification[0].score,
-                'fingers_up': fingers,
-                'palm_pos': self._calculate_palm_center(hand_landmarks)  # Renommer en palm_pos
-            }
-            hands_info.append(hand_info)
-        
-        return hands_info
-    
-    def _draw_hand(self, frame, landmarks):
-        """Dessine les points et connexions de la main avec plus d'informations"""
-        h, w = frame.shape[:2]
         
-        # Dessiner toutes les connexions
-        self.mp_drawing.draw_landmarks(
-            frame, 
-            landmarks,
-            self.mp_hands.HAND_CONNECTIONS,
-            self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),  # Points verts
-            self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)  # Lignes rouges
+        return hand_frames_from_landmarks(
+            np.stack([landmarks for landmarks, _, _ in hands]),
+            [encode_handedness(handedness) for _, handedness, _ in hands],
+            [score for _, _, score in hands]
         )
+    
+    def _detect(self, frame, timestamp):
+        """Inférence (région d'intérêt ou frame entière) : [(points (21, 3), main, score)]"""
+        timestamp_ms = int(round((time.time() if timestamp is None else timestamp) * 1000))
         
-        # Dessiner les bouts des doigts avec des couleurs différentes et des étiquettes
-        finger_colors = {
-            'thumb': (255, 0, 0),      # Rouge
-            'index': (0, 255, 0),      # Vert
-            'middle': (0, 0, 255),     # Bleu
-            'ring': (255, 255, 0),     # Jaune
-            'pinky': (255, 0, 255)     # Magenta
-        }
+        hands = None
+        if self.roi_mode and self.roi is not None and self.frames_since_full < self.roi_refresh_interval:
+            hands = self._process_roi(frame, timestamp_ms)
+            self.frames_since_full += 1
         
-        finger_names = ['thumb', 'index', 'middle', 'ring', 'pinky']
-        for tip, name in zip(self.FINGER_TIPS, finger_names):
-            x = int(landmarks.landmark[tip].x * w)
-            y = int(landmarks.landmark[tip].y * h)
+        if hands is None:
+            # Conversion en RGB pour MediaPipe
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             
-            # Dessiner un cercle plus grand pour le bout du doigt
-            cv2.circle(frame, (x, y), 8, finger_colors[name], -1)
-            
-            # Ajouter le nom du doigt
-            cv2.putText(frame, name, (x-20, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, finger_colors[name], 2)
-    
-    def _count_fingers(self, landmarks):
-        """Compte les doigts levés avec plus de détails"""
-        fingers = {
-            'thumb': {'up': False, 'angle': 0},
-            'index': {'up': False, 'angle': 0},
-            'middle': {'up': False, 'angle': 0},
-            'ring': {'up': False, 'angle': 0},
-            'pinky': {'up': False, 'angle': 0},
-            'total_up': 0
-        }
+            # Détection
+            hands = self.backend.process(rgb_frame, timestamp_ms)
+            self.full_frames += 1
+            self.frames_since_full = 0
         
-        # Vérifier chaque doigt
-        finger_names = ['thumb', 'index', 'middle', 'ring', 'pinky']
+        # Si pas de main détectée
+        if not hands:
+            self.roi = None
+            return []
         
-        for idx, (tip, base, name) in enumerate(zip(self.FINGER_TIPS, self.FINGER_BASES, finger_names)):
-            # Position des points
-            tip_y = landmarks.landmark[tip].y
-            base_y = landmarks.landmark[base].y
-            
-            # Le pouce est un cas spécial
-            if idx == 0:
-                tip_x = landmarks.landmark[tip].x
-                base_x = landmarks.landmark[base].x
-                
-                # Détecter si c'est une main gauche ou droite
-                is_right_hand = landmarks.landmark[0].x < landmarks.landmark[5].x
-                is_up = tip_x < base_x if is_right_hand else tip_x > base_x
-                
-                # Calculer l'angle pour le pouce
-                dx = tip_x - base_x
-                dy = tip_y - base_y
-                angle = abs(np.degrees(np.arctan2(dy, dx)))
-                fingers[name]['angle'] = angle
-            else:
-                # Pour les autres doigts, on compare la hauteur
-                is_up = tip_y < base_y
-                
-                # Calculer l'angle pour les autres doigts
-                dx = landmarks.landmark[tip].x - landmarks.landmark[base].x
-                dy = landmarks.landmark[tip].y - landmarks.landmark[base].y
-                angle = abs(np.degrees(np.arctan2(dy, dx)))
-                fingers[name]['angle'] = angle
-            
-            fingers[name]['up'] = is_up
-            if is_up:
-                fingers['total_up'] += 1
+        if self.roi_mode:
+            self.roi = self._compute_roi([landmarks for landmarks, _, _ in hands], frame.shape)
+        return hands
+    
+    def reset_tracking(self):
+        """Oublie la région d'intérêt (changement de vidéo ou de source)"""
+        self.roi = None
+        self.frames_since_full = 0
+        self.backend.reset()
+        if self.roi_backend is not None:
+            self.roi_backend.reset()
+    
+    def close(self):
+        """Libère les modèles de détection"""
+        self.backend.close()
+        if self.roi_backend is not None:
+            self.roi_backend.close()
+            self.roi_backend = None
+    
+    def _process_roi(self, frame, timestamp_ms):
+        """Détection dans la région d'intérêt ; None si le suivi est perdu"""
+        if self.roi_backend is None:
+            self.roi_backend = self.backend.clone()
         
-        return fingers
-
-    def _calculate_palm_center(self, landmarks):
-        """Calcule le centre de la paume en utilisant les points de base des doigts"""
-        # Points qui forment le centre de la paume (0 = poignet, 5,9,13,17 = base des doigts)
-        palm_points = [0, 5, 9, 13, 17]
+        x0, y0, x1, y1 = self.roi
+        rgb_crop = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2RGB)
+        hands = self.roi_backend.process(rgb_crop, timestamp_ms)
+        if not hands:
+            self.roi = None
+            return None
+        self.roi_frames += 1
         
-        # Calculer la moyenne des coordonnées
-        x_mean = sum(landmarks.landmark[i].x for i in palm_points) / len(palm_points)
-        y_mean = sum(landmarks.landmark[i].y for i in palm_points) / len(palm_points)
-        z_mean = sum(landmarks.landmark[i].z for i in palm_points) / len(palm_points)
+        # Coordonnées de la région -> coordonnées normalisées de la frame entière
+        h, w = frame.shape[:2]
+        scale_x = (x1 - x0) / w
+        scale_y = (y1 - y0) / h
+        # z est exprimé à l'échelle de la largeur de l'image
+        scale = np.array([scale_x, scale_y, scale_x], dtype=np.float32)
+        offset = np.array([x0 / w, y0 / h, 0.0], dtype=np.float32)
+        return [(landmarks * scale + offset, handedness, score) for landmarks, handedness, score in hands]
+    
+    def _compute_roi(self, hands_landmarks, shape):
+        """Boîte englobant les mains avec une marge, en pixels"""
+        h, w = shape[:2]
+        boxes = bounding_boxes(np.stack(hands_landmarks))
+        min_x, min_y = boxes[:, :2].min(axis=0)
+        max_x, max_y = boxes[:, 2:].max(axis=0)
+        # Région carrée en pixels : MediaPipe attend des mains non déformées
+        size = max((max_x - min_x) * w, (max_y - min_y) * h)
+        size = max(size * (1 + 2 * self.roi_padding), self.roi_min_size * min(w, h))
+        center_x = (min_x + max_x) / 2 * w
+        center_y = (min_y + max_y) / 2 * h
         
-        return {'x': float(x_mean), 'y': float(y_mean), 'z': float(z_mean)}
\ No newline at end of file
+        x0 = int(max(0, center_x - size / 2))
+        y0 = int(max(0, center_y - size / 2))
+        x1 = int(min(w, center_x + size / 2))
+        y1 = int(min(h, center_y + size / 2))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        # Région presque aussi grande que la frame : aucun gain
+        if (x1 - x0) * (y1 - y0) > 0.8 * w * h:
+            return None
+        return x0, y0, x1, y1
@@ -0,0 +1,339 @@
+import numpy as np
+
+FINGER_NAMES = ['thumb', 'index', 'middle', 'ring', 'pinky']
+HANDEDNESS_CODES = {'Left': 0, 'Right': 1}
+UNKNOWN_HANDEDNESS = 2
+N_LANDMARKS = 21
+
+# Emplacements fixes des deux mains dans les tableaux de gestes
+LEFT_SLOT = 0
+RIGHT_SLOT = 1
+HAND_SLOTS = 2
+
+# Points formant le centre de la paume (0 = poignet, 5, 9, 13, 17 = base des doigts)
+PALM_POINTS = [0, 5, 9, 13, 17]
+
+# Points des doigts (pouce, index, majeur, annulaire, auriculaire)
+FINGER_TIPS = [4, 8, 12, 16, 20]  # Bout des doigts
+FINGER_BASES = [2, 5, 9, 13, 17]  # Base des doigts
+FINGER_BITS = 1 << np.arange(len(FINGER_NAMES))
+ALL_FINGERS = (1 << len(FINGER_NAMES)) - 1
+
+
+def encode_fingers(fingers):
+    """Encode l'état des doigts en deux masques 5 bits (levés, présents)"""
+    mask = 0
+    present = 0
+    if isinstance(fingers, dict):
+        for bit, name in enumerate(FINGER_NAMES):
+            info = fingers.get(name)
+            if isinstance(info, dict):
+                present |= 1 << bit
+                if info.get('up', False):
+                    mask |= 1 << bit
+    return mask, present
+
+
+def encode_finger_angles(fingers):
+    """Encode les angles des doigts dans un tableau de 5 valeurs"""
+    angles = np.zeros(len(FINGER_NAMES), dtype=np.float32)
+    if isinstance(fingers, dict):
+        for bit, name in enumerate(FINGER_NAMES):
+            info = fingers.get(name)
+            if isinstance(info, dict):
+                angles[bit] = info.get('angle', 0)
+    return angles
+
+
+def encode_palm(palm_pos):
+    """Encode la position de la paume en vecteur (x, y, z) et indique sa validité"""
+    if isinstance(palm_pos, dict) and all(k in palm_pos for k in ('x', 'y', 'z')):
+        return [float(palm_pos['x']), float(palm_pos['y']), float(palm_pos['z'])], True
+    if isinstance(palm_pos, (list, tuple, np.ndarray)) and len(palm_pos) >= 3:
+        return [float(palm_pos[0]), float(palm_pos[1]), float(palm_pos[2])], True
+    return [0.0, 0.0, 0.0], False
+
+
+def encode_landmarks(landmarks):
+    """Encode les points de repère dans un tableau (21, 3) et retourne le nombre de points"""
+    points = np.zeros((N_LANDMARKS, 3), dtype=np.float32)
+    if landmarks is None or len(landmarks) == 0:
+        return points, 0
+    if isinstance(landmarks[0], dict):
+        landmarks = [[point.get('x', 0), point.get('y', 0), point.get('z', 0)] for point in landmarks]
+    array = np.asarray(landmarks, dtype=np.float32).reshape(-1, 3)[:N_LANDMARKS]
+    points[:len(array)] = array
+    return points, len(array)
+
+
+def encode_handedness(handedness):
+    """Encode la main utilisée ('Left', 'Right' ou inconnue)"""
+    return HANDEDNESS_CODES.get(handedness, UNKNOWN_HANDEDNESS)
+
+
+def finger_states(landmarks):
+    """État des doigts calculé sur un tableau de points (..., 21, 3)
+
+    Accepte une main (21, 3) ou un lot de mains (N, 21, 3). Retourne le
+    masque des doigts levés et les angles (degrés) de chaque doigt.
+    Le pouce est levé s'il s'écarte vers l'extérieur de la main (le sens
+    dépend de la main, déduit de la position du poignet et de l'index) ;
+    les autres doigts sont levés si leur bout est plus haut que leur base.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    tips = landmarks[..., FINGER_TIPS, :2]
+    bases = landmarks[..., FINGER_BASES, :2]
+    delta = tips - bases
+    angles = np.abs(np.degrees(np.arctan2(delta[..., 1], delta[..., 0])))
+
+    up = delta[..., 1] < 0
+    is_right_hand = landmarks[..., 0, 0] < landmarks[..., 5, 0]
+    up[..., 0] = np.where(is_right_hand, delta[..., 0, 0] < 0, delta[..., 0, 0] > 0)
+    mask = (up * FINGER_BITS).sum(axis=-1)
+    return mask, angles.astype(np.float32)
+
+
+def palm_centers(landmarks):
+    """Centre de la paume (..., 3) : moyenne du poignet et des bases des doigts"""
+    return np.asarray(landmarks, dtype=np.float32)[..., PALM_POINTS, :].mean(axis=-2)
+
+
+def bounding_boxes(landmarks):
+    """Boîte englobante (..., 4) des points : (min_x, min_y, max_x, max_y)"""
+    points = np.asarray(landmarks, dtype=np.float32)[..., :2]
+    return np.concatenate([points.min(axis=-2), points.max(axis=-2)], axis=-1)
+
+
+def hand_frames_from_landmarks(landmarks, handedness_codes, scores):
+    """Construit les HandFrame d'un lot de mains en une seule passe
+
+    landmarks : tableau (N, 21, 3) ; doigts, angles et paumes sont calculés
+    pour toutes les mains à la fois (plusieurs mains d'une frame ou mains de
+    nombreuses frames lors d'un traitement hors ligne).
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, N_LANDMARKS, 3)
+    masks, angles = finger_states(landmarks)
+    palms = palm_centers(landmarks)
+    return [
+        HandFrame(
+            landmarks[i],
+            finger_mask=int(masks[i]),
+            finger_present=ALL_FINGERS,
+            palm=palms[i],
+            handedness_code=int(handedness_codes[i]),
+            score=float(scores[i]),
+            finger_angles=angles[i]
+        )
+        for i in range(len(landmarks))
+    ]
+
+
+def decode_fingers(mask, present, angles=None):
+    """Reconstruit le dictionnaire des doigts à partir des masques"""
+    fingers = {}
+    total_up = 0
+    for bit, name in enumerate(FINGER_NAMES):
+        if int(present) & (1 << bit):
+            is_up = bool(int(mask) & (1 << bit))
+            fingers[name] = {
+                'up': is_up,
+                'angle': float(angles[bit]) if angles is not None else 0
+            }
+            total_up += is_up
+    if fingers:
+        fingers['total_up'] = total_up
+    return fingers
+
+
+def decode_handedness(code):
+    """Retourne le nom de la main à partir de son code"""
+    for name, value in HANDEDNESS_CODES.items():
+        if value == code:
+            return name
+    return 'Unknown'
+
+
+def combine_hands(hands_info):
+    """Première main détectée, avec la seconde main éventuelle dans frame.other"""
+    if isinstance(hands_info, (dict, HandFrame)):
+        return HandFrame.coerce(hands_info)
+    hands = [hand for hand in map(HandFrame.coerce, hands_info or []) if hand is not None]
+    if not hands:
+        return None
+    if len(hands) == 1:
+        return hands[0]
+    combined = hands[0].copy()
+    combined.other = hands[1]
+    return combined
+
+
+def hand_slots(frame):
+    """Répartit les mains d'une frame dans les emplacements [gauche, droite]
+
+    Une main de côté inconnu va à droite ; si les deux mains sont annoncées
+    du même côté, la seconde prend l'emplacement libre.
+    """
+    slots = [None] * HAND_SLOTS
+    for hand in (frame, frame.other):
+        if hand is None:
+            continue
+        slot = LEFT_SLOT if hand.handedness_code == HANDEDNESS_CODES['Left'] else RIGHT_SLOT
+        if slots[slot] is not None:
+            slot = 1 - slot
+        if slots[slot] is None:
+            slots[slot] = hand
+    return slots
+
+
+class HandFrame:
+    """Une main détectée sur une frame, stockée dans des tableaux compacts
+
+    Points de repère (21, 3) en float32, doigts levés en masque 5 bits,
+    centre de la paume en vecteur (x, y, z), main utilisée en code entier.
+    C'est la représentation commune du détecteur, du traducteur et de la
+    bibliothèque de gestes. other contient la seconde main de la même frame
+    pour les gestes à deux mains (None sinon).
+
+    L'accès par clé de l'ancien format dictionnaire reste possible
+    (frame['palm_pos'], frame.get('fingers_up'), ...) : les valeurs sont
+    alors reconstruites à la demande. Les tableaux ne sont jamais modifiés
+    sur place, ils peuvent donc être partagés entre copies.
+    """
+
+    __slots__ = (
+        'landmarks', 'landmark_count', 'finger_mask', 'finger_present', 'finger_angles',
+        'palm', 'palm_valid', 'handedness_code', 'score', 'time', 'other'
+    )
+
+    # Clés de l'ancien format dictionnaire
+    KEYS = ('landmarks', 'handedness', 'confidence', 'fingers_up', 'fingers', 'palm_pos', 'time')
+
+    def __init__(self, landmarks, finger_mask=0, finger_present=0, palm=None, handedness_code=UNKNOWN_HANDEDNESS,
+                 score=0.0, finger_angles=None, palm_valid=True, landmark_count=None, time=0.0, other=None):
+        self.landmarks = landmarks
+        self.landmark_count = len(landmarks) if landmark_count is None else landmark_count
+        self.finger_mask = finger_mask
+        self.finger_present = finger_present
+        self.finger_angles = np.zeros(len(FINGER_NAMES), dtype=np.float32) if finger_angles is None else finger_angles
+        if palm is None:
+            palm = np.zeros(3, dtype=np.float32)
+            palm_valid = False
+        self.palm = palm
+        self.palm_valid = palm_valid
+        self.handedness_code = handedness_code
+        self.score = score
+        self.time = time
+        self.other = other
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construit une frame à partir de l'ancien format dictionnaire"""
+        landmarks, count = encode_landmarks(data.get('landmarks'))
+        palm, palm_valid = encode_palm(data.get('palm_pos'))
+        fingers = data.get('fingers_up', data.get('fingers'))
+        mask, present = encode_fingers(fingers)
+        other = data.get('other_hand')
+        return cls(
+            landmarks,
+            finger_mask=mask,
+            finger_present=present,
+            palm=np.array(palm, dtype=np.float32),
+            handedness_code=encode_handedness(data.get('handedness')),
+            score=float(data.get('confidence', 0.0)),
+            finger_angles=encode_finger_angles(fingers),
+            palm_valid=palm_valid,
+            landmark_count=count,
+            time=float(data.get('time', 0.0) or 0.0),
+            other=cls.from_dict(other) if isinstance(other, dict) else None
+        )
+
+    @classmethod
+    def coerce(cls, frame):
+        """Retourne la frame sous forme de HandFrame (None si format invalide)"""
+        if isinstance(frame, HandFrame):
+            return frame
+        if isinstance(frame, dict):
+            return cls.from_dict(frame)
+        return None
+
+    def copy(self):
+        """Copie légère (les tableaux et la seconde main sont partagés)"""
+        return HandFrame(
+            self.landmarks, self.finger_mask, self.finger_present, self.palm, self.handedness_code,
+            self.score, self.finger_angles, self.palm_valid, self.landmark_count, self.time, self.other
+        )
+
+    @property
+    def handedness(self):
+        return decode_handedness(self.handedness_code)
+
+    @property
+    def fingers(self):
+        return decode_fingers(self.finger_mask, self.finger_present, self.finger_angles)
+
+    def to_dict(self):
+        """Ancien format dictionnaire (export JSON)"""
+        data = {
+            'fingers': self.fingers,
+            'palm_pos': self['palm_pos'],
+            'landmarks': self.landmarks[:self.landmark_count].tolist(),
+            'handedness': self.handedness,
+            'time': float(self.time)
+        }
+        if self.other is not None:
+            data['other_hand'] = self.other.to_dict()
+        return data
+
+    # --- Compatibilité avec l'ancien format dictionnaire ---
+
+    def __getitem__(self, key):
+        if key == 'landmarks':
+            return self.landmarks[:self.landmark_count]
+        if key == 'palm_pos':
+            if not self.palm_valid:
+                return {}
+            return {'x': float(self.palm[0]), 'y': float(self.palm[1]), 'z': float(self.palm[2])}
+        if key in ('fingers', 'fingers_up'):
+            return self.fingers
+        if key == 'handedness':
+            return self.handedness
+        if key == 'confidence':
+            return self.score
+        if key == 'time':
+            return self.time
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'landmarks':
+            self.landmarks, self.landmark_count = encode_landmarks(value)
+        elif key == 'palm_pos':
+            palm, self.palm_valid = encode_palm(value)
+            self.palm = np.array(palm, dtype=np.float32)
+        elif key in ('fingers', 'fingers_up'):
+            self.finger_mask, self.finger_present = encode_fingers(value)
+            self.finger_angles = encode_finger_angles(value)
+        elif key == 'handedness':
+            self.handedness_code = encode_handedness(value)
+        elif key == 'confidence':
+            self.score = float(value)
+        elif key == 'time':
+            self.time = float(value)
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def keys(self):
+        return list(self.KEYS)
+
+    def __repr__(self):
+        return (f"HandFrame({self.handedness}, doigts={self.finger_mask:05b}, "
+                f"paume={self.palm.tolist()}, score={self.score:.2f}"
+                f"{', deux mains' if self.other is not None else ''})")
@@ -0,0 +1,206 @@
+import argparse
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from hand_frame import N_LANDMARKS, HandFrame
+
+LOG_MAGIC = b'HLOG'
+LOG_VERSION = 1
+
+_FILE_HEADER = struct.Struct('<4sH')
+# Horodatage (s) et nombre de mains de la frame (0 : aucune main détectée)
+_FRAME_HEADER = struct.Struct('<dB')
+
+# Enregistrement binaire d'une main (293 octets)
+HAND_DTYPE = np.dtype([
+    ('landmarks', '<f4', (N_LANDMARKS, 3)),
+    ('palm_pos', '<f4', (3,)),
+    ('finger_angles', '<f4', (5,)),
+    ('confidence', '<f4'),
+    ('landmark_count', 'u1'),
+    ('palm_valid', 'u1'),
+    ('finger_mask', 'u1'),
+    ('finger_present', 'u1'),
+    ('handedness', 'i1'),
+])
+
+
+def encode_hands(hands_info):
+    """Encode les mains d'une frame (sortie de HandDetector.detect_hands)"""
+    hands = [hand for hand in map(HandFrame.coerce, hands_info or []) if hand is not None]
+    records = np.zeros(len(hands), dtype=HAND_DTYPE)
+    for record, hand in zip(records, hands):
+        record['landmarks'] = hand.landmarks
+        record['landmark_count'] = hand.landmark_count
+        record['palm_pos'] = hand.palm
+        record['palm_valid'] = hand.palm_valid
+        record['finger_mask'] = hand.finger_mask
+        record['finger_present'] = hand.finger_present
+        record['finger_angles'] = hand.finger_angles
+        record['handedness'] = hand.handedness_code
+        record['confidence'] = hand.score
+    return records
+
+
+def decode_hands(records):
+    """Reconstruit hands_info (même format que HandDetector.detect_hands)"""
+    if len(records) == 0:
+        return None
+    return [
+        HandFrame(
+            records['landmarks'][i],
+            finger_mask=int(records['finger_mask'][i]),
+            finger_present=int(records['finger_present'][i]),
+            palm=records['palm_pos'][i],
+            handedness_code=int(records['handedness'][i]),
+            score=float(records['confidence'][i]),
+            finger_angles=records['finger_angles'][i],
+            palm_valid=bool(records['palm_valid'][i]),
+            landmark_count=int(records['landmark_count'][i])
+        )
+        for i in range(len(records))
+    ]
+
+
+class LandmarkRecorder:
+    """Enregistre en continu les mains détectées dans un journal binaire
+
+    Le journal ne contient que les données de HandDetector.detect_hands :
+    il peut être rejoué sans vidéo ni MediaPipe (voir LandmarkReplay).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(_FILE_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    def write(self, hands_info, timestamp=None):
+        """Ajoute une frame au journal"""
+        records = encode_hands(hands_info)
+        data = _FRAME_HEADER.pack(time.time() if timestamp is None else timestamp, len(records)) + records.tobytes()
+        with self._lock:
+            if self.file is None:
+                return
+            self.file.write(data)
+            self.frames += 1
+
+    def close(self):
+        with self._lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LandmarkReplay:
+    """Relit un journal de mains et le rejoue dans SignTranslator.translate"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        if len(self.data) < _FILE_HEADER.size:
+            raise ValueError(f"Journal de mains invalide: {path}")
+        magic, version = _FILE_HEADER.unpack_from(self.data)
+        if magic != LOG_MAGIC:
+            raise ValueError(f"Journal de mains invalide: {path}")
+        if version != LOG_VERSION:
+            raise ValueError(f"Version de journal non supportée: {version}")
+
+    def __iter__(self):
+        """Retourne (horodatage, hands_info) pour chaque frame enregistrée"""
+        data = self.data
+        offset = _FILE_HEADER.size
+        while offset + _FRAME_HEADER.size <= len(data):
+            timestamp, n_hands = _FRAME_HEADER.unpack_from(data, offset)
+            offset += _FRAME_HEADER.size
+            end = offset + n_hands * HAND_DTYPE.itemsize
+            if end > len(data):
+                # Dernière frame incomplète (enregistrement interrompu)
+                break
+            records = np.frombuffer(data, dtype=HAND_DTYPE, count=n_hands, offset=offset)
+            offset = end
+            yield timestamp, decode_hands(records)
+
+    def replay(self, session, realtime=False, on_sign=None):
+        """Rejoue le journal dans une session de reconnaissance (RecognitionSession)
+
+        realtime : respecter l'intervalle enregistré entre les frames, sinon
+        aussi vite que possible. Les horodatages enregistrés sont passés à
+        translate, le résultat est donc identique dans les deux cas.
+        on_sign(horodatage, signe) est appelé pour chaque geste reconnu.
+        Retourne les statistiques (frames, signes, durée, FPS).
+        """
+        frames = 0
+        signs = 0
+        start = time.perf_counter()
+        first_timestamp = None
+
+        for timestamp, hands_info in self:
+            if realtime:
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                delay = (timestamp - first_timestamp) - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            frames += 1
+            # Même règle que l'application : toutes les mains détectées
+            sign = session.translate(hands_info or None, timestamp=timestamp)
+            if sign and sign not in ("Aucune main détectée", "En apprentissage...", "Format de données invalide"):
+                signs += 1
+                if on_sign is not None:
+                    on_sign(timestamp, sign)
+
+        elapsed = time.perf_counter() - start
+        return {
+            'frames': frames,
+            'signs': signs,
+            'elapsed': elapsed,
+            'fps': frames / elapsed if elapsed > 0 else 0.0
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rejoue un journal de mains dans le traducteur (sans caméra ni MediaPipe)"
+    )
+    parser.add_argument('logs', nargs='+', help="Journaux de mains (.hlog)")
+    parser.add_argument('--realtime', action='store_true', help="Rejouer à la vitesse d'enregistrement")
+    parser.add_argument('--mode', choices=['frame', 'sequence'], default='frame',
+                        help="Mode de reconnaissance du traducteur")
+    parser.add_argument('--quiet', action='store_true', help="Ne pas afficher les gestes reconnus")
+    args = parser.parse_args(argv)
+
+    # Import tardif : le traducteur n'est pas nécessaire pour lire un journal
+    from sign_translator import SignTranslator
+
+    translator = SignTranslator()
+
+    def print_sign(timestamp, sign):
+        print(f"{timestamp:.3f}\t{sign}")
+
+    for path in args.logs:
+        # Nouvel état de reconnaissance pour chaque journal
+        stats = LandmarkReplay(path).replay(
+            translator.new_session(args.mode),
+            realtime=args.realtime,
+            on_sign=None if args.quiet else print_sign
+        )
+        print(f"{path} : {stats['frames']} frames, {stats['signs']} signes, "
+              f"{stats['elapsed']:.2f}s ({stats['fps']:.0f} FPS)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,35 @@
+from startup import BackgroundLoader, StartupReport
+# Mesure du démarrage dès le lancement (imports compris)
+startup_report = StartupReport()
+
 import cv2
 import tkinter as tk
-from PIL import Image, ImageTk
-from hand_detector import HandDetector
-from sign_translator import SignTranslator
-from text_to_speech import TextToSpeech
+from detection_governor import DetectionGovernor
+from power_manager import IdlePowerManager
 from gui import GUI
 from video_source import VideoSource
 from translations import Translator
+from pipeline import Pipeline
+from frame_pacer import FramePacer
+from landmark_log import LandmarkRecorder
+from overlay_renderer import OVERLAY_DETAILS, OverlayRenderer
+import argparse
 import time
-import threading
+from collections import deque
+startup_report.mark('imports')
 
 class Application:
-    def __init__(self):
+    def __init__(self, sign_translator=None, video_source=None):
+        """Les sous-systèmes sont fournis par main (créés une seule fois)"""
         self.translator = Translator()
-        self.sign_translator = SignTranslator()
-        self.video_source = VideoSource()
-        # Initialiser la caméra au démarrage
-        if not self.video_source.open_camera():
-            print(self.translator.get_text('error_camera'))
+        self.sign_translator = sign_translator
+        # État de reconnaissance du flux de la caméra (RecognitionSession)
+        self.session = None
+        self.video_source = video_source
         self.gui = None
         self.last_sign = None
         self.last_detection_time = 0
         self.detection_cooldown = 1.5
-        
-        # Donner une référence de l'application au traducteur
-        self.sign_translator.app = self
 
     def process_frame(self, frame, hand_info):
         """Traite une frame de la vidéo"""
@@ -32,15 +37,15 @@ class Application:
         
         if hand_info:
             # Si en mode apprentissage
-            if self.sign_translator.is_learning:
-                if self.sign_translator.add_learning_frame(hand_info):
-                    self.gui.update_learning_status(True, len(self.sign_translator.gesture_frames))
+            if self.session.is_learning:
+                if self.session.add_learning_frame(hand_info):
+                    self.gui.update_learning_status(True, len(self.session.gesture_frames))
                 else:
-                    self.gui.update_learning_status(True, len(self.sign_translator.gesture_frames))
+                    self.gui.update_learning_status(True, len(self.session.gesture_frames))
             # Sinon, traduire le geste
             else:
                 # Reconnaissance du geste
-                sign = self.sign_translator.translate(hand_info)
+                sign = self.session.translate(hand_info)
                 
                 # Si un geste est reconnu et que le cooldown est passé
                 if sign and sign != self.translator.get_text('gesture_not_recognized') and sign != self.translator.get_text('no_hand_detected'):
@@ -61,8 +66,8 @@ class Application:
                     
                     self.gui.update_translation(info_text)
         else:
-            if self.sign_translator.is_learning:
-                self.gui.update_learning_status(True, len(self.sign_translator.gesture_frames))
+            if self.session.is_learning:
+                self.gui.update_learning_status(True, len(self.session.gesture_frames))
         
         # Mise à jour de l'affichage
         self.gui.update_frame(frame)
@@ -70,65 +75,137 @@ class Application:
     def start_learning(self, gesture_name):
         """Démarre l'apprentissage d'un nouveau geste"""
         if gesture_name:
-            self.sign_translator.start_learning(gesture_name)
+            self.session.start_learning(gesture_name)
             self.gui.update_learning_status(True)
         else:
-            self.sign_translator.stop_learning()
+            self.session.stop_learning()
             self.gui.update_learning_status(False)
     
     def stop_learning(self):
         """Arrête l'apprentissage"""
-        self.sign_translator.stop_learning()
+        self.session.stop_learning()
         self.gui.update_learning_status(False)
     
     def remove_gestures(self):
         """Supprime tous les gestes personnalisés"""
         self.sign_translator.clear_custom_gestures()
 
-def main():
-    # Initialisation
-    detector = HandDetector()
-    translator = SignTranslator()
-    tts = TextToSpeech()
+def load_detector(detector_options):
+    """Import de MediaPipe et création du détecteur (phase la plus longue)"""
+    from hand_detector import HandDetector
+    # Région d'intérêt : moins de pixels par détection quand une main est suivie
+    options = {'roi_mode': True}
+    options.update(detector_options or {})
+    return HandDetector(**options)
+
+def load_translator():
+    """Chargement de la bibliothèque de gestes"""
+    from sign_translator import SignTranslator
+    return SignTranslator()
+
+def load_speech():
+    """Import de pyttsx3 / VLC ; le moteur est créé par le thread de synthèse (attendu ici)"""
+    from text_to_speech import TextToSpeech
+    return TextToSpeech()
+
+def main(record_path=None, detector_options=None, overlay_detail='full', recognition_mode=None):
+    # Interface graphique affichée tout de suite, le reste se charge en arrière-plan
     video_source = VideoSource()
+    with startup_report.phase('interface'):
+        root = tk.Tk()
+        app = Application(video_source=video_source)
+        gui = GUI(root, app)
+        app.gui = gui
+        gui.update_translation("Chargement...")
+        root.update()
+    startup_report.mark('fenêtre')
+    
+    # Sous-systèmes lourds initialisés en parallèle, une seule fois chacun
+    loader = BackgroundLoader(startup_report)
+    loader.add('caméra', lambda: video_source.open_camera(threaded=True))
+    loader.add('détecteur', lambda: load_detector(detector_options))
+    loader.add('traducteur', load_translator)
+    loader.add('voix', load_speech)
+    loader.start()
+    
+    # Sous-systèmes disponibles une fois le chargement terminé
+    hand_detector = None
+    governor = None
+    detector = None
+    translator = None
+    session = None
+    tts = None
+    pipeline = None
     
-    # Interface graphique
-    root = tk.Tk()
-    app = Application()
-    gui = GUI(root, app)
-    app.gui = gui
+    # Derniers gestes validés, numérotés (écrits par le thread de traduction) :
+    # chaque paquet en emporte une copie, un paquet sauté ne perd donc aucun sous-titre
+    recognized_signs = deque(maxlen=16)
+    recognized_count = 0
+    last_subtitle = 0
     
-    # Connecter le traducteur à l'application
-    translator.app = app
-    app.sign_translator = translator
+    # Commandes d'apprentissage du thread Tk, exécutées dans l'ordre par l'étage
+    # traduction (seul thread qui modifie la session)
+    learning_commands = deque()
+    learning_issued = 0  # Dernière commande envoyée (thread Tk)
+    learning_done = 0  # Dernière commande exécutée (thread de traduction)
+    gui_learning = False  # Statut affiché (thread Tk)
+    
+    # Source vidéo courante (incrémentée par le thread Tk à chaque changement) :
+    # l'étage détection réinitialise le suivi entre deux frames quand elle change
+    source_generation = 0
+    detected_generation = 0
     
     # Variables
     last_sign = None
     last_sign_time = time.time()
     sign_cooldown = 1.0
+    last_frame_seq = 0
+    
+    # Enregistrement optionnel des mains détectées (rejouable sans caméra)
+    recorder = LandmarkRecorder(record_path) if record_path else None
+    
+    # Dessin des mains sur la frame affichée (séparé de la détection)
+    overlay = OverlayRenderer(overlay_detail)
+    
+    # Rafraîchissement de l'affichage à la cadence de la source
+    pacer = FramePacer()
     
     def change_video_source(source_type, url=None):
-        """Change la source vidéo"""
+        """Change la source vidéo
+
+        Le suivi des mains est réinitialisé par l'étage détection à la
+        première frame de la nouvelle source, jamais depuis le thread Tk.
+        """
+        nonlocal source_generation
+        if pipeline is None:
+            print("Chargement en cours, changement de source impossible")
+            return
+        source_generation += 1
         video_source.release()  # Libérer l'ancienne source
+        pacer.reset()
         
         if source_type == "camera":
-            success = video_source.open_camera()
+            success = video_source.open_camera(threaded=True)
         elif source_type == "local":
-            success = video_source.open_local_video(url)  # url contient le chemin du fichier
+            success = video_source.open_local_video(url, threaded=True)  # url contient le chemin du fichier
         
         if not success:
             print(f"Erreur lors du changement de source vidéo: {source_type}")
     
     def start_learning(gesture_name):
-        """Commence ou termine l'apprentissage d'un geste"""
-        if gesture_name is None:
-            # Terminer l'apprentissage
-            translator.stop_learning()
-            gui.update_learning_status(False)
-        else:
-            # Commencer l'apprentissage
-            translator.start_learning(gesture_name)
-            gui.update_learning_status(True)
+        """Commence (nom) ou termine (None) l'apprentissage d'un geste
+
+        La commande est exécutée par l'étage traduction du pipeline : la
+        session n'est jamais modifiée depuis le thread Tk.
+        """
+        nonlocal learning_issued, gui_learning
+        if translator is None:
+            print("Chargement en cours, apprentissage impossible")
+            return
+        learning_issued += 1
+        learning_commands.append((learning_issued, gesture_name))
+        gui_learning = gesture_name is not None
+        gui.update_learning_status(gui_learning)
     
     def show_gesture_info(gesture_name):
         """Affiche les informations sur un geste spécifique"""
@@ -141,99 +218,259 @@ def main():
         gui.update_translation(info_text)
     
     def remove_all_gestures():
-        """Supprime tous les gestes personnalisés"""
+        """Supprime tous les gestes personnalisés (False si impossible)"""
+        if translator is None:
+            print("Chargement en cours, suppression impossible")
+            return False
         translator.clear_all_custom_gestures()
         show_gesture_info('BONJOUR')  # Mettre à jour l'affichage
+        return True
     
     # Définir les callbacks
     gui.set_video_source_callback(change_video_source)
     gui.set_learn_callback(start_learning)
     gui.set_remove_gesture_callback(remove_all_gestures)
     
-    # Démarrer avec la caméra par défaut
-    video_source.open_camera()
+    def capture_frame():
+        """Étage capture : récupère la prochaine frame de la source"""
+        nonlocal last_frame_seq
+        # Source lue avant la frame : une frame de l'ancienne source n'est jamais
+        # attribuée à la nouvelle
+        generation = source_generation
+        ret, frame, frame_seq, timestamp = video_source.read_next(timeout=0.1)
+        # Ne traiter que les nouvelles frames
+        if not ret or frame_seq == last_frame_seq:
+            return None
+        last_frame_seq = frame_seq
+        # Miroir horizontal
+        return {'frame': cv2.flip(frame, 1), 'seq': frame_seq, 'timestamp': timestamp, 'source': generation}
     
-    def update_frame():
-        """Met à jour l'image de la caméra"""
-        ret, frame = video_source.read()
-        if ret:
-            # Miroir horizontal
-            frame = cv2.flip(frame, 1)
+    def detect_frame(packet):
+        """Étage détection : détecte les mains dans la frame"""
+        nonlocal detected_generation
+        if packet['source'] != detected_generation:
+            # Nouvelle source : suivi, veille et sauts de détection repartent de zéro
+            detected_generation = packet['source']
+            detector.reset_tracking()
+        packet['hands'] = detector.detect_hands(packet['frame'], packet['timestamp'])
+        if recorder is not None:
+            recorder.write(packet['hands'], packet['timestamp'])
+        return packet
+    
+    def on_sign_recognized(timestamp, sign):
+        """Geste validé par la session (thread de traduction)"""
+        nonlocal recognized_count
+        print(f"Signe LSF détecté : {sign}")
+        recognized_count += 1
+        recognized_signs.append((recognized_count, sign))
+    
+    def run_learning_commands():
+        """Exécute les commandes d'apprentissage reçues du thread Tk"""
+        nonlocal learning_done
+        while learning_commands:
+            learning_done, gesture_name = learning_commands.popleft()
+            if gesture_name is None:
+                session.stop_learning()
+            else:
+                session.start_learning(gesture_name)
+    
+    def translate_frame(packet):
+        """Étage traduction : reconnaissance du geste ou apprentissage"""
+        was_learning = session.is_learning
+        run_learning_commands()
+        packet['learning_command'] = learning_done
+        hands = packet['hands']
+        packet['learning'] = session.is_learning
+        if hands and len(hands) > 0:
+            hand_info = hands[0]  # Première main détectée (affichage)
             
-            # Détecter les mains
-            hands = detector.detect_hands(frame)
-            if hands and len(hands) > 0:
-                hand_info = hands[0]  # Prendre la première main détectée
+            # Si en mode apprentissage (les deux mains sont enregistrées)
+            if session.is_learning:
+                session.add_learning_frame(hands)
+            # Sinon, traduire le geste
+            else:
+                # Reconnaissance du geste (gestes à une ou deux mains)
+                sign = session.translate(hands)
+                packet['sign'] = sign
                 
-                # Si en mode apprentissage
-                if translator.is_learning:
-                    if translator.add_learning_frame(hand_info):
-                        gui.update_learning_status(True, len(translator.gesture_frames))
-                    else:
-                        gui.update_learning_status(True, len(translator.gesture_frames))
-                # Sinon, traduire le geste
-                else:
-                    # Reconnaissance du geste
-                    sign = translator.translate(hand_info)
-                    
-                    # Synthèse vocale si nouveau geste
-                    nonlocal last_sign, last_sign_time
-                    current_time = time.time()
-                    
-                    if sign != "Geste non reconnu" and sign != "En apprentissage..." and (
-                        sign != last_sign or 
-                        current_time - last_sign_time >= sign_cooldown
-                    ):
-                        last_sign = sign
-                        last_sign_time = current_time
-                        threading.Thread(target=tts.speak, args=(sign,), daemon=True).start()
-                    
-                    # Affichage des informations
-                    hand_type = "Main droite" if hand_info.get('handedness') == "Right" else "Main gauche"
-                    fingers = hand_info.get('fingers_up', {})
-                    
-                    # Liste des doigts levés
-                    finger_names = {
-                        'thumb': 'Pouce',
-                        'index': 'Index',
-                        'middle': 'Majeur',
-                        'ring': 'Annulaire',
-                        'pinky': 'Auriculaire'
-                    }
-                    
-                    raised_fingers = [
-                        finger_names[finger] 
-                        for finger, info in fingers.items() 
-                        if finger != 'total_up' and info.get('up', False)
-                    ]
-                    
-                    info_text = (
-                        f"Main détectée : {hand_type}\n"
-                        f"Doigts levés : {', '.join(raised_fingers)}\n"
-                        f"Geste reconnu : {sign}"
-                    )
-                    
-                    gui.update_translation(info_text)
+                # Affichage des informations
+                hand_type = "Main droite" if hand_info.get('handedness') == "Right" else "Main gauche"
+                fingers = hand_info.get('fingers_up', {})
+                
+                # Liste des doigts levés
+                finger_names = {
+                    'thumb': 'Pouce',
+                    'index': 'Index',
+                    'middle': 'Majeur',
+                    'ring': 'Annulaire',
+                    'pinky': 'Auriculaire'
+                }
+                
+                raised_fingers = [
+                    finger_names[finger] 
+                    for finger, info in fingers.items() 
+                    if finger != 'total_up' and info.get('up', False)
+                ]
+                
+                packet['info_text'] = (
+                    f"Main détectée : {hand_type}\n"
+                    f"Doigts levés : {', '.join(raised_fingers)}\n"
+                    f"Geste reconnu : {sign}"
+                )
+        packet['learning_frames'] = len(session.gesture_frames)
+        packet['recognized'] = tuple(recognized_signs)
+        if was_learning and not session.is_learning:
+            # Nom du nouveau geste prêt à être prononcé (arrêt demandé ou automatique)
+            tts.prepare(list(translator.custom_gestures))
+        return packet
+    
+    def render_frame(packet):
+        """Étage affichage : dessine les mains sur la frame à afficher"""
+        overlay.draw(packet['frame'], packet['hands'])
+        return packet
+    
+    def finish_startup():
+        """Assemble les sous-systèmes chargés et démarre le pipeline (thread Tk)"""
+        nonlocal hand_detector, governor, detector, translator, session, tts, pipeline
+        hand_detector = loader.get('détecteur')
+        translator = loader.get('traducteur')
+        tts = loader.get('voix')
+        if not loader.get('caméra'):
+            print(app.translator.get_text('error_camera'))
+        
+        # Détection sautée quand l'image bouge peu (signeur immobile entre deux signes)
+        governor = DetectionGovernor(hand_detector)
+        # Veille (cadence réduite) quand aucune main n'est visible
+        detector = IdlePowerManager(governor, video_source)
+        
+        # Session de reconnaissance du flux de la caméra ; les gestes validés
+        # sont joints au paquet et affichés en sous-titre par le thread Tk
+        session = translator.new_session(recognition_mode)
+        session.subscribe(on_sign_recognized)
+        app.sign_translator = translator
+        app.session = session
+        
+        # Pré-synthèse vocale des gestes connus (en arrière-plan)
+        tts.prepare(list(translator.gestures) + list(translator.custom_gestures))
+        
+        # Pipeline : chaque étage dans son propre thread, files bornées
+        pipeline = Pipeline(queue_size=2)
+        pipeline.add_source('capture', capture_frame)
+        pipeline.add_stage('detect', detect_frame)
+        pipeline.add_stage('translate', translate_frame)
+        if overlay_detail != 'none':
+            pipeline.add_stage('render', render_frame)
+        pipeline.start()
+        
+        show_gesture_info('BONJOUR')
+        startup_report.mark('prêt')
+        print(startup_report.summary())
+    
+    def update_frame():
+        """Affiche les frames terminées par le pipeline (thread Tk uniquement)"""
+        nonlocal last_sign, last_sign_time, last_subtitle, gui_learning
+        if pipeline is None:
+            # Attente de la fin du chargement
+            if loader.ready.is_set():
+                if loader.errors:
+                    root.destroy()
+                    return
+                finish_startup()
             else:
-                if translator.is_learning:
-                    gui.update_learning_status(True, len(translator.gesture_frames))
+                root.after(20, update_frame)
+                return
+        
+        packet = pipeline.get_result()
+        if packet is not None:
+            # Sous-titres mis à jour uniquement depuis le thread Tk
+            for number, sign in packet['recognized']:
+                if number > last_subtitle:
+                    gui.update_subtitle(sign)
+                    last_subtitle = number
+            # Statut d'apprentissage de la session, une fois les commandes envoyées exécutées
+            # (fin automatique au nombre maximal de frames comprise)
+            if packet['learning_command'] >= learning_issued and packet['learning'] != gui_learning:
+                gui_learning = packet['learning']
+                gui.update_learning_status(gui_learning)
+            if packet['learning']:
+                gui.update_learning_status(True, packet['learning_frames'])
+            elif 'sign' in packet:
+                sign = packet['sign']
+                
+                # Synthèse vocale si nouveau geste
+                current_time = time.time()
+                
+                if sign != "Geste non reconnu" and sign != "En apprentissage..." and (
+                    sign != last_sign or 
+                    current_time - last_sign_time >= sign_cooldown
+                ):
+                    last_sign = sign
+                    last_sign_time = current_time
+                    tts.speak(sign)
+                
+                gui.update_translation(packet['info_text'])
             
             # Mise à jour de l'affichage
-            gui.update_frame(frame)
+            gui.update_frame(packet['frame'], packet['seq'])
+            pacer.frame_shown(packet['seq'])
+        else:
+            pacer.frame_missed()
         
-        # Planifier la prochaine mise à jour
-        root.after(10, update_frame)
+        # Planifier la prochaine mise à jour (cadence de veille si aucune main)
+        pacer.set_fps(detector.idle_fps if detector.idle else video_source.get_fps())
+        root.after(pacer.next_delay_ms(), update_frame)
     
     # Démarrer la boucle de mise à jour
     update_frame()
     
-    show_gesture_info('BONJOUR')
-    
     # Démarrer la boucle principale
     root.mainloop()
     
     # Nettoyage
+    if pipeline is None:
+        # Fenêtre fermée avant la fin du chargement
+        loader.ready.wait()
+        video_source.release()
+        for name in ('détecteur', 'traducteur'):
+            if loader.get(name) is not None:
+                loader.get(name).close()
+        if recorder is not None:
+            recorder.close()
+        return
+    pipeline.stop()
     video_source.release()
+    translator.close()
+    hand_detector.close()
+    report = governor.report()
+    print(f"Détections sautées : {report['skipped']}/{report['frames']} ({100 * report['skip_ratio']:.0f}%)")
+    idle_report = detector.report()
+    print(f"Veille : {idle_report['idle_time']:.0f}s, {idle_report['wakeups']} réveil(s)")
+    speech_report = tts.report()
+    print(f"Voix : {speech_report['spoken']} phrase(s), premier son en {1000 * speech_report['avg_first_audio']:.0f} ms "
+          f"en moyenne, {speech_report['dropped']} signe(s) abandonné(s)")
+    pace_report = pacer.report()
+    print(f"Affichage : {pace_report['achieved_fps']:.1f} FPS (cible {pace_report['target_fps']:.0f}), "
+          f"{pace_report['dropped_frames']} frame(s) non affichée(s)")
+    if recorder is not None:
+        recorder.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Traducteur de langue des signes en temps réel")
+    parser.add_argument('--record', metavar='FICHIER', help="Enregistrer les mains détectées dans un journal (.hlog)")
+    parser.add_argument('--backend', choices=['legacy', 'video', 'live_stream'], default='legacy',
+                        help="Moteur de détection (live_stream : HandLandmarker asynchrone)")
+    parser.add_argument('--model-complexity', type=int, choices=[0, 1], default=1,
+                        help="Modèle léger (0) ou complet (1) du moteur legacy")
+    parser.add_argument('--model', default='hand_landmarker.task', help="Modèle .task des moteurs HandLandmarker")
+    parser.add_argument('--delegate', choices=['cpu', 'gpu'], default='cpu', help="Matériel des moteurs HandLandmarker")
+    parser.add_argument('--mode', choices=['frame', 'sequence'], default='frame',
+                        help="Mode de reconnaissance : pose par pose ou séquence (DTW en continu)")
+    parser.add_argument('--overlay', choices=OVERLAY_DETAILS, default='full',
+                        help="Détail du dessin des mains sur la vidéo (none : aucun dessin)")
+    args = parser.parse_args()
+    main(record_path=args.record, detector_options={
+        'backend': args.backend,
+        'model_complexity': args.model_complexity,
+        'model_asset_path': args.model,
+        'delegate': args.delegate
+    }, overlay_detail=args.overlay, recognition_mode=args.mode)
\ No newline at end of file
@@ -10,9 +10,25 @@ a = Analysis(
     binaries=[],
     datas=[
         ('custom_gestures.json', '.'),
+        ('batch_translate.py', '.'),
+        ('detection_governor.py', '.'),
+        ('frame_pacer.py', '.'),
         ('gui.py', '.'),
+        ('gesture_matcher.py', '.'),
+        ('gesture_store.py', '.'),
         ('hand_detector.py', '.'),
+        ('hand_frame.py', '.'),
+        ('landmark_log.py', '.'),
+        ('neighbor_index.py', '.'),
+        ('overlay_renderer.py', '.'),
+        ('pipeline.py', '.'),
+        ('power_manager.py', '.'),
+        ('recognition_session.py', '.'),
+        ('sequence_recognizer.py', '.'),
         ('sign_translator.py', '.'),
+        ('speech_cache.py', '.'),
+        ('speech_scheduler.py', '.'),
+        ('startup.py', '.'),
         ('text_to_speech.py', '.'),
         ('translations.py', '.'),
         ('video_source.py', '.'),
@@ -27,6 +43,7 @@ a = Analysis(
         'numpy',
         'mediapipe',
         'pyttsx3',
+        'vlc',
     ] + collect_submodules('mediapipe'),
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,195 @@
+import copy
+
+import numpy as np
+
+try:
+    from sklearn.neighbors import KDTree
+except ImportError:
+    KDTree = None
+
+
+class NeighborIndex:
+    """Index des plus proches voisins (KD-tree) sur les frames de référence
+
+    Chaque frame est plongée dans un vecteur de taille fixe (landmarks,
+    position de la paume, masque des doigts de chaque emplacement de main,
+    mains présentes) pondéré comme le score du GestureMatcher. Les k frames
+    les plus proches sont ensuite recalculées avec le score exact.
+
+    L'arbre n'est pas reconstruit à chaque modification : les gestes ajoutés
+    sont comparés directement en attendant la prochaine reconstruction et les
+    gestes supprimés sont simplement masqués.
+
+    Chaque instantané du GestureMatcher a son propre index : une
+    modification retourne un nouvel index (rebuild, added, removed) qui
+    partage l'arbre avec l'ancien, jamais modifié après sa construction.
+    """
+
+    def __init__(self, matcher, n_neighbors=32, leaf_size=40, min_frames=1000, rebuild_ratio=0.25):
+        self.matcher = matcher
+        self.n_neighbors = n_neighbors
+        self.leaf_size = leaf_size
+        # En dessous de ce nombre de frames, la comparaison directe est plus rapide
+        self.min_frames = min_frames
+        # Proportion de frames ajoutées ou supprimées avant reconstruction de l'arbre
+        self.rebuild_ratio = rebuild_ratio
+
+        self.tree = None
+        self._uid_by_name = {}
+        self._next_uid = 0
+        self._point_uid = np.zeros(0, dtype=np.int64)
+        self._point_pos = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._pending = {}
+        self._changed_frames = 0
+        self._uid_offsets = None
+
+    @property
+    def active(self):
+        """Indique si l'arbre est utilisable pour les requêtes"""
+        return self.tree is not None
+
+    def embed(self, landmarks, palm_positions, palm_valid, finger_masks, presence):
+        """Construit les vecteurs de taille fixe utilisés par l'arbre
+
+        Tableaux par emplacement de main : landmarks (N, 2, 21, 3),
+        palm_positions (N, 2, 3), palm_valid et finger_masks (N, 2),
+        presence (N,).
+        """
+        m = self.matcher
+        n = len(landmarks)
+        slots = landmarks.shape[1]
+        landmark_part = landmarks.reshape(n, -1) * (m.landmark_weight / np.sqrt(landmarks.shape[2]))
+        palm_part = (palm_positions * (m.palm_weight / m.max_palm_distance) * palm_valid[..., None]).reshape(n, -1)
+        finger_part = ((finger_masks[..., None] >> np.arange(5)) & 1).reshape(n, -1) * (m.finger_weight / 5)
+        hand_part = ((presence[:, None] >> np.arange(slots)) & 1) * (1 - m.wrong_hand_penalty)
+        return np.hstack((landmark_part, palm_part, finger_part, hand_part)).astype(np.float32)
+
+    def _embed_current(self, current):
+        """Vecteurs des mains courantes : les deux ensemble, puis chacune seule
+
+        Avec deux mains, les références à une main sont comparées à la
+        meilleure main courante : chaque main seule est aussi cherchée pour
+        que la main en trop n'éloigne pas ces références dans l'arbre.
+        """
+        block = current['block']
+        slot_sets = [current['slots']]
+        if len(current['slots']) > 1:
+            slot_sets += [current['slots'][i:i + 1] for i in range(len(current['slots']))]
+        masks = np.array([np.isin(np.arange(len(block['finger_masks'])), slots) for slots in slot_sets])
+        return self.embed(
+            block['landmarks'][None] * masks[:, :, None, None],
+            block['palm_positions'][None] * masks[:, :, None],
+            block['palm_valid'][None] & masks,
+            block['finger_masks'][None] * masks,
+            np.array([sum(1 << int(slot) for slot in slots) for slots in slot_sets])
+        )
+
+    def _copy(self):
+        """Copie pour un nouvel instantané (l'arbre est partagé)"""
+        index = copy.copy(self)
+        index._uid_by_name = dict(self._uid_by_name)
+        index._alive = self._alive.copy()
+        index._pending = dict(self._pending)
+        index._uid_offsets = None
+        return index
+
+    def rebuild(self, snapshot):
+        """Nouvel index construit sur toutes les frames de l'instantané"""
+        index = self._copy()
+        index._build(snapshot)
+        return index
+
+    def _build(self, snapshot):
+        self._uid_by_name = {}
+        self._next_uid = 0
+        for name in snapshot.names:
+            self._new_uid(name)
+        self._alive = np.ones(self._next_uid, dtype=bool)
+        self._point_uid = snapshot.frame_gesture.astype(np.int64)
+        self._point_pos = (
+            np.arange(snapshot.frame_count) - snapshot.offsets[snapshot.frame_gesture]
+            if snapshot.frame_count else np.zeros(0, dtype=np.int64)
+        )
+        self._pending = {}
+        self._changed_frames = 0
+        self._uid_offsets = None
+
+        self.tree = None
+        if KDTree is None or snapshot.frame_count < self.min_frames:
+            return
+        points = self.embed(
+            snapshot.landmarks, snapshot.palm_positions, snapshot.palm_valid,
+            snapshot.finger_masks, snapshot.hand_presence
+        )
+        self.tree = KDTree(points, leaf_size=self.leaf_size)
+
+    def _new_uid(self, name):
+        uid = self._next_uid
+        self._next_uid += 1
+        self._uid_by_name[name] = uid
+        return uid
+
+    def added(self, name, n_frames, snapshot):
+        """Nouvel index avec un geste ajouté à la fin de l'instantané"""
+        index = self._copy()
+        index._forget(name)
+        uid = index._new_uid(name)
+        index._alive = np.append(index._alive, True)
+        index._pending[uid] = name
+        index._changed_frames += n_frames
+        index._maybe_rebuild(snapshot)
+        return index
+
+    def removed(self, name, n_frames, snapshot):
+        """Nouvel index sans le geste supprimé de l'instantané"""
+        index = self._copy()
+        if index._forget(name):
+            index._changed_frames += n_frames
+            index._maybe_rebuild(snapshot)
+        return index
+
+    def _forget(self, name):
+        uid = self._uid_by_name.pop(name, None)
+        if uid is None:
+            return False
+        self._alive[uid] = False
+        self._pending.pop(uid, None)
+        return True
+
+    def _maybe_rebuild(self, snapshot):
+        if self.tree is None:
+            if KDTree is not None and snapshot.frame_count >= self.min_frames:
+                self._build(snapshot)
+        elif self._changed_frames > self.rebuild_ratio * max(1, len(self._point_uid)):
+            self._build(snapshot)
+
+    def _offsets_by_uid(self, snapshot):
+        """Position de chaque geste (par identifiant) dans les tableaux de l'instantané"""
+        if self._uid_offsets is None:
+            offsets = np.full(self._next_uid, -1, dtype=np.int64)
+            for g, name in enumerate(snapshot.names):
+                uid = self._uid_by_name.get(name)
+                if uid is not None:
+                    offsets[uid] = snapshot.offsets[g]
+            self._uid_offsets = offsets
+        return self._uid_offsets
+
+    def query(self, current, snapshot):
+        """Retourne les indices des frames candidates, ou None si l'arbre est inactif"""
+        if self.tree is None:
+            return None
+
+        k = min(self.n_neighbors, len(self._point_uid))
+        _, indices = self.tree.query(self._embed_current(current), k=k)
+        indices = np.unique(indices)
+        uids = self._point_uid[indices]
+        alive = self._alive[uids]
+        frames = [self._offsets_by_uid(snapshot)[uids[alive]] + self._point_pos[indices][alive]]
+
+        # Gestes ajoutés depuis la dernière reconstruction : comparaison directe
+        for uid, name in self._pending.items():
+            g = snapshot.names.index(name)
+            frames.append(np.arange(snapshot.offsets[g], snapshot.offsets[g] + snapshot.lengths[g]))
+
+        return np.unique(np.concatenate(frames))
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+from hand_frame import FINGER_NAMES, FINGER_TIPS
+
+# Connexions du squelette de la main (même topologie que mp.solutions.hands.HAND_CONNECTIONS)
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4),          # Pouce
+    (0, 5), (5, 6), (6, 7), (7, 8),          # Index
+    (5, 9), (9, 10), (10, 11), (11, 12),     # Majeur
+    (9, 13), (13, 14), (14, 15), (15, 16),   # Annulaire
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20)  # Auriculaire et paume
+])
+
+# Niveaux de détail, du plus léger au plus complet
+OVERLAY_DETAILS = ('none', 'points', 'skeleton', 'full')
+
+FINGER_COLORS = {
+    'thumb': (255, 0, 0),      # Rouge
+    'index': (0, 255, 0),      # Vert
+    'middle': (0, 0, 255),     # Bleu
+    'ring': (255, 255, 0),     # Jaune
+    'pinky': (255, 0, 255)     # Magenta
+}
+
+
+class OverlayRenderer:
+    """Dessin des mains détectées sur la frame affichée
+
+    Le détecteur ne fait que retourner des données ; ce rendu n'est appelé
+    que lorsqu'un affichage consomme les frames (jamais en traitement hors
+    ligne). detail : 'none' (rien), 'points' (points de repère), 'skeleton'
+    (points et connexions) ou 'full' (squelette, bouts des doigts colorés et
+    leur nom).
+    """
+
+    def __init__(self, detail='full'):
+        if detail not in OVERLAY_DETAILS:
+            raise ValueError(f"Niveau de détail inconnu: {detail}")
+        self.detail = detail
+
+    def draw(self, frame, hands_info):
+        """Dessine les mains sur la frame (modifiée sur place) et la retourne"""
+        if self.detail == 'none' or not hands_info:
+            return frame
+        h, w = frame.shape[:2]
+        scale = np.array([w, h], dtype=np.float32)
+        for hand_info in hands_info:
+            landmarks = np.asarray(hand_info['landmarks'], dtype=np.float32)
+            if len(landmarks) < 21:
+                continue
+            points = (landmarks[:, :2] * scale).astype(np.int32)
+
+            if self.detail != 'points':
+                # Toutes les connexions en un seul appel
+                cv2.polylines(frame, list(points[HAND_CONNECTIONS]), False, (255, 0, 0), 2)  # Lignes rouges
+            for point in map(tuple, points.tolist()):
+                cv2.circle(frame, point, 2, (0, 255, 0), -1)  # Points verts
+
+            if self.detail == 'full':
+                self._draw_fingertips(frame, points)
+        return frame
+
+    def _draw_fingertips(self, frame, points):
+        """Bouts des doigts avec des couleurs différentes et des étiquettes"""
+        for tip, name in zip(FINGER_TIPS, FINGER_NAMES):
+            x, y = points[tip].tolist()
+
+            # Dessiner un cercle plus grand pour le bout du doigt
+            cv2.circle(frame, (x, y), 8, FINGER_COLORS[name], -1)
+
+            # Ajouter le nom du doigt
+            cv2.putText(frame, name, (x-20, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, FINGER_COLORS[name], 2)
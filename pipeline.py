@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """File bornée qui supprime l'élément le plus ancien quand elle est pleine"""
+
+    def __init__(self, maxsize=2):
+        self.items = deque()
+        self.maxsize = max(1, maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Retourne l'élément le plus ancien (None si rien avant le délai)"""
+        with self.condition:
+            if not self.items:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def get_latest(self):
+        """Retourne l'élément le plus récent sans attendre et vide la file"""
+        with self.condition:
+            if not self.items:
+                return None
+            self.dropped += len(self.items) - 1
+            item = self.items[-1]
+            self.items.clear()
+            return item
+
+    def __len__(self):
+        return len(self.items)
+
+
+class PipelineStage(threading.Thread):
+    """Étage du pipeline exécuté dans son propre thread
+
+    Un étage source (sans file d'entrée) appelle func() en boucle, les autres
+    appellent func(item) pour chaque élément reçu. Un résultat None n'est pas
+    transmis à l'étage suivant.
+    """
+
+    def __init__(self, name, func, input_queue, output_queue, poll_timeout=0.1):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.poll_timeout = poll_timeout
+        self.processed = 0
+        self.total_time = 0.0
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            if self.input_queue is None:
+                item = None
+            else:
+                item = self.input_queue.get(self.poll_timeout)
+                if item is None:
+                    continue
+
+            start = time.perf_counter()
+            try:
+                result = self.func() if self.input_queue is None else self.func(item)
+            except Exception as e:
+                print(f"Erreur dans l'étage '{self.name}' du pipeline: {str(e)}")
+                result = None
+                # Éviter une boucle d'erreurs trop rapide
+                time.sleep(0.01)
+
+            if result is not None:
+                self.total_time += time.perf_counter() - start
+                self.processed += 1
+                self.output_queue.put(result)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class Pipeline:
+    """Pipeline capture -> détection -> traduction avec un thread par étage
+
+    Les étages communiquent par des files bornées qui suppriment les
+    éléments les plus anciens : le débit est limité par l'étage le plus lent
+    et non par la somme des étages. Le thread Tk ne fait que consommer les
+    résultats terminés (get_result).
+    """
+
+    def __init__(self, queue_size=2):
+        self.queue_size = queue_size
+        self.stages = []
+        self.output_queue = None
+
+    def add_source(self, name, func):
+        """Ajoute l'étage source : func() retourne un élément ou None"""
+        self.output_queue = DropOldestQueue(self.queue_size)
+        self.stages.append(PipelineStage(name, func, None, self.output_queue))
+
+    def add_stage(self, name, func):
+        """Ajoute un étage de traitement : func(élément) retourne un élément ou None"""
+        if self.output_queue is None:
+            raise ValueError("Le pipeline doit commencer par une source")
+        input_queue = self.output_queue
+        self.output_queue = DropOldestQueue(self.queue_size)
+        self.stages.append(PipelineStage(name, func, input_queue, self.output_queue))
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for stage in self.stages:
+            stage.join(timeout=1.0)
+
+    def get_result(self):
+        """Retourne le résultat terminé le plus récent (ou None), sans bloquer"""
+        if self.output_queue is None:
+            return None
+        return self.output_queue.get_latest()
+
+    def stats(self):
+        """Statistiques par étage : éléments traités, temps moyen, éléments supprimés"""
+        return {
+            stage.name: {
+                'processed': stage.processed,
+                'avg_ms': 1000 * stage.total_time / stage.processed if stage.processed else 0.0,
+                'dropped': stage.output_queue.dropped
+            }
+            for stage in self.stages
+        }
@@ -0,0 +1,102 @@
+import time
+
+import cv2
+
+
+class IdlePowerManager:
+    """Mode veille quand aucune main n'est visible
+
+    Après idle_after frames sans main, la caméra est lue à idle_fps et
+    MediaPipe n'est plus appelé : une simple différence entre vignettes en
+    niveaux de gris (check_size) sert de détection de présence. Dès qu'un
+    mouvement apparaît, la détection complète est lancée sur la même frame
+    et, si une main est trouvée, la cadence normale est rétablie
+    immédiatement.
+    """
+
+    def __init__(self, detector, video_source, idle_after=90, idle_fps=4,
+                 motion_threshold=4.0, check_size=(160, 120), recheck_interval=2.0):
+        self.detector = detector
+        self.video_source = video_source
+        self.idle_after = idle_after  # Frames sans main avant la mise en veille
+        self.idle_fps = idle_fps
+        self.motion_threshold = motion_threshold  # Différence moyenne (0-255) réveillant la détection
+        self.check_size = check_size
+        self.recheck_interval = recheck_interval  # Détection complète de sécurité en veille (s)
+
+        self.idle = False
+        self.frames_without_hands = 0
+        self.reference = None
+        self.last_full_check = 0
+        self.idle_since = None
+        self.idle_time = 0.0
+        self.idle_frames = 0
+        self.wakeups = 0
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.check_size, interpolation=cv2.INTER_AREA)
+
+    def detect_hands(self, frame, timestamp=None):
+        """Même interface que HandDetector.detect_hands"""
+        if timestamp is None:
+            timestamp = time.time()
+
+        if self.idle:
+            self.idle_frames += 1
+            thumbnail = self._thumbnail(frame)
+            motion = cv2.absdiff(thumbnail, self.reference).mean()
+            self.reference = thumbnail
+            if motion < self.motion_threshold and timestamp - self.last_full_check < self.recheck_interval:
+                return None
+            self.last_full_check = timestamp
+
+        hands_info = self.detector.detect_hands(frame, timestamp)
+
+        if hands_info:
+            self.frames_without_hands = 0
+            if self.idle:
+                self._wake()
+        elif not self.idle:
+            self.frames_without_hands += 1
+            if self.frames_without_hands >= self.idle_after:
+                self._sleep(frame, timestamp)
+        return hands_info
+
+    def _sleep(self, frame, timestamp):
+        """Passage en veille : cadence réduite, détection de présence seulement"""
+        self.idle = True
+        self.idle_since = time.time()
+        self.reference = self._thumbnail(frame)
+        self.last_full_check = timestamp
+        self.video_source.set_capture_rate(self.idle_fps)
+
+    def _wake(self):
+        """Sortie de veille : cadence normale rétablie sans attendre"""
+        if not self.idle:
+            return
+        self.idle = False
+        self.frames_without_hands = 0
+        self.reference = None
+        self.idle_time += time.time() - self.idle_since
+        self.idle_since = None
+        self.wakeups += 1
+        self.video_source.set_capture_rate(None)
+
+    def reset_tracking(self):
+        """Changement de source : retour au mode normal"""
+        self._wake()
+        self.frames_without_hands = 0
+        self.detector.reset_tracking()
+
+    def report(self):
+        """Temps passé en veille et nombre de réveils"""
+        idle_time = self.idle_time
+        if self.idle:
+            idle_time += time.time() - self.idle_since
+        return {
+            'idle': self.idle,
+            'idle_time': idle_time,
+            'idle_frames': self.idle_frames,
+            'wakeups': self.wakeups
+        }
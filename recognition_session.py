@@ -0,0 +1,622 @@
+import numpy as np
+import time
+import math
+from sequence_recognizer import SpringRecognizer
+from hand_frame import HandFrame
+
+class RecognitionSession:
+    """État de reconnaissance d'un flux vidéo (caméra, fichier, journal de mains)
+
+    La bibliothèque de gestes (SignTranslator : gestes, moteur de
+    correspondance, réglages) est partagée entre toutes les sessions d'un
+    processus : la reconnaissance lit l'instantané du moteur de
+    correspondance sans verrou, seules les modifications (geste appris,
+    suppression) prennent le verrou de la bibliothèque. La session ne garde
+    que ce qui est propre à son flux : historique des mouvements, geste en
+    cours de confirmation, délai depuis le dernier geste, colonnes DTW du
+    mode séquence et frames en cours d'apprentissage. Elle n'est utilisée
+    que par un seul thread (apprentissage compris).
+
+    translate retourne le geste reconnu ; les gestes validés sont aussi
+    transmis aux fonctions abonnées avec subscribe (sous-titres, journal...).
+    """
+
+    def __init__(self, library, recognition_mode=None):
+        self.library = library
+        # Mode de reconnaissance : 'frame' (pose par pose) ou 'sequence' (DTW en continu)
+        self.recognition_mode = recognition_mode or library.recognition_mode
+        self.listeners = []
+        
+        # Colonnes DTW propres au flux, sur le moteur de correspondance partagé
+        self.sequence_recognizer = SpringRecognizer(library.matcher)
+        self.library_version = library.version
+        
+        # Variables pour l'apprentissage
+        self.is_learning = False
+        self.current_gesture = None
+        self.gesture_frames = []
+        self.last_frame_time = 0
+        
+        # Historique des mouvements (pour chaque main) et confirmation du geste
+        self.reset()
+
+    def reset(self):
+        """Réinitialise l'état de reconnaissance (nouveau flux, nouvelle vidéo)"""
+        self.movement_history_left = []
+        self.movement_history_right = []
+        self.current_gesture_candidate = None
+        self.gesture_start_time = 0
+        # Aucun geste récent : le premier geste du flux n'attend pas le délai
+        self.last_detection_time = float('-inf')
+        self.last_sequence_match = None
+        self.sequence_recognizer.reset()
+        self.library_version = self.library.version
+
+    def _sync_library(self):
+        """Réinitialise les colonnes DTW si la bibliothèque a changé depuis la dernière frame"""
+        if self.library_version != self.library.version:
+            self.library_version = self.library.version
+            self.sequence_recognizer.reset()
+
+    def subscribe(self, callback):
+        """Abonne callback(horodatage, geste) aux gestes validés par la session"""
+        self.listeners.append(callback)
+
+    def start_learning(self, gesture_name):
+        """Commence l'apprentissage d'un nouveau geste"""
+        self.is_learning = True
+        self.current_gesture = gesture_name.upper()
+        self.gesture_frames = []
+        self.last_frame_time = 0
+        print(f"\n=== Début de l'enregistrement du geste '{gesture_name}' ===")
+        print("Faites votre geste maintenant...")
+
+    def stop_learning(self):
+        """Arrête l'apprentissage et sauvegarde le geste"""
+        if self.is_learning and self.current_gesture:
+            print(f"\n=== Fin de l'enregistrement du geste '{self.current_gesture}' ===")
+            
+            if len(self.gesture_frames) < self.library.min_frames:
+                print(f"ERREUR: Pas assez de frames capturées ({len(self.gesture_frames)} < {self.library.min_frames})")
+                print("Veuillez refaire le geste plus lentement.")
+            else:
+                # Geste ajouté à la bibliothèque partagée (toutes les sessions)
+                cleaned_frames = self.library.add_learned_gesture(self.current_gesture, self.gesture_frames)
+                print("Geste enregistré avec succès !")
+                print(f"- Nombre de frames capturées : {len(cleaned_frames)}")
+                print(f"- Durée totale : {sum(f.get('time', 0) for f in cleaned_frames):.1f} secondes")
+        
+        self.is_learning = False
+        self.current_gesture = None
+        self.gesture_frames = []
+        self.last_frame_time = 0
+
+    def add_learning_frame(self, hand_info):
+        """Ajoute une frame à la séquence d'apprentissage"""
+        try:
+            if not self.is_learning:
+                return False
+                
+            # Vérifier le temps écoulé depuis la dernière frame
+            current_time = time.time()
+            if current_time - self.last_frame_time < self.library.frame_interval:
+                return False
+                
+            # Extraire les caractéristiques
+            features = self.library.extract_features(hand_info)
+            if not features:
+                return False
+                
+            # Vérifier si la position est nouvelle
+            if len(self.gesture_frames) == 0 or self._is_new_position(features):
+                self.gesture_frames.append(features)
+                self.last_frame_time = current_time
+                
+                # Vérifier si on a atteint le nombre maximum de frames
+                if len(self.gesture_frames) >= self.library.max_frames:
+                    self.stop_learning()
+                    
+                return True
+                
+            return False
+            
+        except Exception as e:
+            print(f"Erreur lors de l'ajout d'une frame: {str(e)}")
+            return False
+
+    def _is_new_position(self, new_features):
+        """Vérifie si la position est suffisamment différente de la dernière position"""
+        if not self.gesture_frames:
+            return True
+            
+        last_features = self.gesture_frames[-1]
+        
+        try:
+            # Calculer la différence de position
+            position_diff = np.linalg.norm(new_features.palm - last_features.palm)
+            
+            # Comparer la configuration des doigts (doigts présents dans les deux frames)
+            common = new_features.finger_present & last_features.finger_present
+            finger_diff = bin((new_features.finger_mask ^ last_features.finger_mask) & common).count('1')
+            
+            # Seconde main : apparition, disparition ou déplacement
+            new_other, last_other = new_features.other, last_features.other
+            if (new_other is None) != (last_other is None):
+                return True
+            if new_other is not None:
+                position_diff = max(position_diff, np.linalg.norm(new_other.palm - last_other.palm))
+            
+            # La position est nouvelle si :
+            # - Une main a bougé suffisamment (> 5% de la taille de l'image)
+            # - OU la configuration des doigts a changé
+            return position_diff > 0.05 or finger_diff > 0
+            
+        except Exception as e:
+            print(f"Erreur lors de la comparaison des positions: {str(e)}")
+            return True
+
+    def update_movement_history(self, hands_info):
+        """Met à jour l'historique des mouvements pour les deux mains"""
+        if not hands_info:
+            return
+            
+        for hand_info in hands_info:
+            palm_center = hand_info.get('palm_pos', None)
+            handedness = hand_info.get('handedness', None)
+            
+            # Vérifier que palm_center est un dictionnaire avec les bonnes clés
+            if palm_center and handedness and isinstance(palm_center, dict):
+                if all(k in palm_center for k in ['x', 'y', 'z']):
+                    if handedness == 'Left':
+                        self.movement_history_left.append(palm_center)
+                        if len(self.movement_history_left) > self.library.max_history:
+                            self.movement_history_left.pop(0)
+                    else:  # Right
+                        self.movement_history_right.append(palm_center)
+                        if len(self.movement_history_right) > self.library.max_history:
+                            self.movement_history_right.pop(0)
+
+    def translate(self, hands_info, timestamp=None):
+        """Traduit les informations des mains en geste
+
+        timestamp : instant de la frame en secondes (par défaut l'heure
+        actuelle) ; permet d'utiliser le temps de la vidéo hors ligne.
+        """
+        self._sync_library()
+        try:
+            if not hands_info:
+                self.current_gesture_candidate = None
+                return "Aucune main détectée"
+            
+            if not isinstance(hands_info, list):
+                if isinstance(hands_info, (dict, HandFrame)):
+                    hands_info = [hands_info]
+                else:
+                    return "Format de données invalide"
+            
+            if self.is_learning:
+                return "En apprentissage..."
+            
+            current_time = timestamp if timestamp is not None else time.time()
+            
+            # Mode séquence : les colonnes DTW doivent avancer à chaque frame
+            if self.recognition_mode == 'sequence':
+                return self._translate_sequence(hands_info, current_time)
+            
+            if current_time - self.last_detection_time < self.library.detection_cooldown:
+                return None
+            
+            # Mettre à jour l'historique des mouvements
+            self.update_movement_history(hands_info)
+            
+            # Vérifier les gestes personnalisés d'abord (toute la bibliothèque en une passe)
+            detected_gestures = []
+            current_features = self.library.extract_features(hands_info)
+            if current_features:
+                try:
+                    detected_gestures.extend(
+                        self.library.matcher.match(current_features, self.library.similarity_threshold)
+                    )
+                except Exception as e:
+                    print(f"Erreur lors de la détection des gestes personnalisés: {str(e)}")
+            
+            # Vérifier les gestes prédéfinis
+            for gesture_name, detect_func in self.library.gestures.items():
+                try:
+                    score = self._calculate_predefined_score(hands_info, detect_func)
+                    if score >= self.library.predefined_threshold:
+                        detected_gestures.append((gesture_name, score))
+                except Exception as e:
+                    print(f"Erreur lors de la détection de {gesture_name}: {str(e)}")
+            
+            if not detected_gestures:
+                self.current_gesture_candidate = None
+                return None
+            
+            # Filtrer et trier les gestes par score
+            detected_gestures = [(name, score) for name, score in detected_gestures if score >= self.library.similarity_threshold]
+            if not detected_gestures:
+                self.current_gesture_candidate = None
+                return None
+                
+            detected_gestures.sort(key=lambda x: x[1], reverse=True)
+            best_gesture, best_score = detected_gestures[0]
+            
+            # Système de confirmation du geste
+            if best_gesture != self.current_gesture_candidate:
+                # Nouveau geste détecté, commencer le minuteur
+                self.current_gesture_candidate = best_gesture
+                self.gesture_start_time = current_time
+                return None
+            elif current_time - self.gesture_start_time >= self.library.gesture_confirmation_time:
+                # Geste maintenu assez longtemps, le valider
+                self.last_detection_time = current_time
+                self._publish_gesture(best_gesture, current_time)
+                return best_gesture
+            
+            # Geste en cours de confirmation
+            return None
+            
+        except Exception as e:
+            print(f"Erreur lors de la traduction: {str(e)}")
+            return None
+
+    def _translate_sequence(self, hands_info, current_time):
+        """Reconnaissance des gestes dynamiques par alignement DTW en continu"""
+        self.update_movement_history(hands_info)
+        
+        current_features = self.library.extract_features(hands_info)
+        if not current_features:
+            return None
+        
+        matches = self.sequence_recognizer.update(current_features, current_time)
+        if not matches or current_time - self.last_detection_time < self.library.detection_cooldown:
+            return None
+        
+        best_match = matches[0]
+        self.last_sequence_match = best_match
+        self.last_detection_time = current_time
+        print(f"Séquence reconnue : {best_match.name} ({best_match.start_time:.2f}s -> {best_match.end_time:.2f}s)")
+        self._publish_gesture(best_match.name, current_time)
+        return best_match.name
+
+    def _publish_gesture(self, gesture_name, timestamp):
+        """Transmet le geste validé aux fonctions abonnées (l'affichage leur revient)"""
+        for callback in list(self.listeners):
+            try:
+                callback(timestamp, gesture_name)
+            except Exception as e:
+                print(f"Erreur lors de la transmission du geste {gesture_name}: {str(e)}")
+
+    def _calculate_predefined_score(self, hands_info, detect_func):
+        """Calcule un score pour un geste prédéfini avec une meilleure pondération"""
+        try:
+            # Vérifier si le geste est détecté
+            if not detect_func(self, hands_info):
+                return 0.0
+            
+            score = 0.0
+            
+            # 1. Position des doigts (50% - augmenté car très important)
+            fingers = hands_info[0].get('fingers_up', {})
+            correct_fingers = 0
+            total_fingers = 0
+            for f in ['thumb', 'index', 'middle', 'ring', 'pinky']:
+                if f in fingers:
+                    total_fingers += 1
+                    if fingers[f].get('up', False):
+                        correct_fingers += 1
+            
+            finger_score = correct_fingers / max(1, total_fingers)
+            score += 0.5 * finger_score
+            
+            # 2. Amplitude du mouvement (30%)
+            movement_score = 0.0
+            if len(self.movement_history_left) >= 2 or len(self.movement_history_right) >= 2:
+                history = self.movement_history_left if len(self.movement_history_left) >= 2 else self.movement_history_right
+                
+                # Calculer la trajectoire complète
+                total_movement = 0
+                for i in range(1, len(history)):
+                    prev_pos = history[i-1]
+                    curr_pos = history[i]
+                    movement = math.sqrt(
+                        (curr_pos['x'] - prev_pos['x'])**2 +
+                        (curr_pos['y'] - prev_pos['y'])**2 +
+                        (curr_pos['z'] - prev_pos['z'])**2
+                    )
+                    total_movement += movement
+                
+                movement_score = min(1.0, total_movement / (self.library.movement_threshold * len(history)))
+            score += 0.3 * movement_score
+            
+            # 3. Stabilité de la main (20% - réduit car moins critique)
+            stability_score = 0.0
+            if len(self.movement_history_left) >= 3 or len(self.movement_history_right) >= 3:
+                history = self.movement_history_left if len(self.movement_history_left) >= 3 else self.movement_history_right
+                
+                # Calculer la variance des positions
+                positions = np.array([[p['x'], p['y'], p['z']] for p in history])
+                variance = np.var(positions, axis=0)
+                avg_variance = np.mean(variance)
+                
+                stability_score = 1.0 - min(1.0, avg_variance / 0.1)
+            score += 0.2 * stability_score
+            
+            return score
+            
+        except Exception as e:
+            print(f"Erreur lors du calcul du score prédéfini: {str(e)}")
+            return 0.0
+
+    def _detect_hello(self, hands_info):
+        """Bonjour en LSF : Main droite qui fait un mouvement de droite à gauche"""
+        try:
+            if not hands_info or not isinstance(hands_info, list):
+                return False
+            
+            # Trouver la main droite
+            right_hand = None
+            for hand in hands_info:
+                if isinstance(hand, (dict, HandFrame)) and hand.get('handedness') == 'Right':
+                    right_hand = hand
+                    break
+            
+            if not right_hand:
+                return False
+            
+            # Vérifier la position des doigts (tous les doigts doivent être levés)
+            fingers = right_hand.get('fingers_up', {})
+            if not isinstance(fingers, dict):
+                return False
+                
+            if not all(fingers.get(f, {}).get('up', False) for f in ['thumb', 'index', 'middle', 'ring', 'pinky']):
+                return False
+            
+            # Vérifier le mouvement horizontal
+            if len(self.movement_history_right) < 2:
+                return False
+                
+            start_pos = np.array(self.movement_history_right[0])
+            end_pos = np.array(self.movement_history_right[-1])
+            movement = end_pos - start_pos
+            
+            horizontal_movement = abs(movement[0])
+            vertical_movement = abs(movement[1])
+            
+            # Le mouvement horizontal doit être plus important que le vertical
+            return horizontal_movement > vertical_movement
+            
+        except Exception as e:
+            print(f"Erreur dans _detect_hello: {str(e)}")
+            return False
+
+    def _detect_thank_you(self, hands_info):
+        """Merci en LSF : Main droite qui descend depuis la bouche"""
+        try:
+            if not hands_info or not isinstance(hands_info, list):
+                return False
+            
+            # Trouver la main droite
+            right_hand = None
+            for hand in hands_info:
+                if isinstance(hand, (dict, HandFrame)) and hand.get('handedness') == 'Right':
+                    right_hand = hand
+                    break
+            
+            if not right_hand:
+                return False
+            
+            # Vérifier la position des doigts (main plate)
+            fingers = right_hand.get('fingers_up', {})
+            if not isinstance(fingers, dict):
+                return False
+                
+            total_up = sum(1 for f in ['thumb', 'index', 'middle', 'ring', 'pinky']
+                          if fingers.get(f, {}).get('up', False))
+            if total_up < 3:  # Au moins 3 doigts levés
+                return False
+            
+            # Vérifier le mouvement vertical
+            if len(self.movement_history_right) < 2:
+                return False
+                
+            start_pos = np.array(self.movement_history_right[0])
+            end_pos = np.array(self.movement_history_right[-1])
+            movement = end_pos - start_pos
+            
+            vertical_movement = abs(movement[1])
+            horizontal_movement = abs(movement[0])
+            
+            # Le mouvement vertical doit être plus important que l'horizontal
+            # et doit aller vers le bas (y augmente vers le bas)
+            return vertical_movement > horizontal_movement and movement[1] > 0
+            
+        except Exception as e:
+            print(f"Erreur dans _detect_thank_you: {str(e)}")
+            return False
+
+    def _detect_yes(self, hands_info):
+        """Oui en LSF : Poing fermé avec mouvement de haut en bas"""
+        try:
+            if not hands_info or not isinstance(hands_info, list):
+                return False
+            
+            # Prendre la première main disponible
+            hand = hands_info[0]
+            if not isinstance(hand, (dict, HandFrame)):
+                return False
+            
+            # Vérifier la position des doigts (poing fermé)
+            fingers = hand.get('fingers_up', {})
+            if not isinstance(fingers, dict):
+                return False
+                
+            total_up = sum(1 for f in ['thumb', 'index', 'middle', 'ring', 'pinky']
+                          if fingers.get(f, {}).get('up', False))
+            if total_up > 1:  # Maximum 1 doigt levé
+                return False
+            
+            # Vérifier le mouvement vertical
+            history = self.movement_history_right if hand.get('handedness') == 'Right' else self.movement_history_left
+            if len(history) < 2:
+                return False
+                
+            start_pos = np.array(history[0])
+            end_pos = np.array(history[-1])
+            movement = end_pos - start_pos
+            
+            vertical_movement = abs(movement[1])
+            horizontal_movement = abs(movement[0])
+            
+            # Le mouvement vertical doit être plus important
+            return vertical_movement > horizontal_movement
+            
+        except Exception as e:
+            print(f"Erreur dans _detect_yes: {str(e)}")
+            return False
+
+    def _detect_no(self, hands_info):
+        """Non en LSF : Index levé avec mouvement de droite à gauche"""
+        try:
+            if not hands_info or not isinstance(hands_info, list):
+                return False
+            
+            # Prendre la première main disponible
+            hand = hands_info[0]
+            if not isinstance(hand, (dict, HandFrame)):
+                return False
+            
+            # Vérifier la position des doigts (index levé uniquement)
+            fingers = hand.get('fingers_up', {})
+            if not isinstance(fingers, dict):
+                return False
+                
+            if not (fingers.get('index', {}).get('up', False) and 
+                   sum(1 for f in ['thumb', 'middle', 'ring', 'pinky']
+                       if fingers.get(f, {}).get('up', False)) == 0):
+                return False
+            
+            # Vérifier le mouvement horizontal
+            history = self.movement_history_right if hand.get('handedness') == 'Right' else self.movement_history_left
+            if len(history) < 2:
+                return False
+                
+            start_pos = np.array(history[0])
+            end_pos = np.array(history[-1])
+            movement = end_pos - start_pos
+            
+            horizontal_movement = abs(movement[0])
+            vertical_movement = abs(movement[1])
+            
+            # Le mouvement horizontal doit être plus important
+            return horizontal_movement > vertical_movement
+            
+        except Exception as e:
+            print(f"Erreur dans _detect_no: {str(e)}")
+            return False
+
+    def _detect_please(self, hands_info):
+        """S'il te plaît : Main plate sur la poitrine qui fait un cercle"""
+        fingers = hands_info[0]['fingers_up']
+        # Main plate qui tourne (tous les doigts tendus)
+        return (fingers['total_up'] >= 4 and 
+                all(fingers[f]['up'] for f in ['index', 'middle', 'ring', 'pinky']))
+
+    def _detect_house(self, hands_info):
+        """Maison : Les deux mains qui forment un toit"""
+        fingers = hands_info[0]['fingers_up']
+        # Tous les doigts tendus pour former le toit
+        return (fingers['total_up'] >= 4 and 
+                all(fingers[f]['up'] for f in ['index', 'middle', 'ring', 'pinky']))
+
+    def _detect_eat(self, hands_info):
+        """Manger : Main qui va vers la bouche"""
+        fingers = hands_info[0]['fingers_up']
+        # Main en forme de pince
+        return (fingers['total_up'] == 2 and 
+                fingers['thumb']['up'] and 
+                fingers['index']['up'] and 
+                not any(fingers[f]['up'] for f in ['middle', 'ring', 'pinky']))
+
+    def _detect_drink(self, hands_info):
+        """Boire : Pouce vers la bouche"""
+        fingers = hands_info[0]['fingers_up']
+        # Uniquement le pouce levé
+        return (fingers['total_up'] == 1 and 
+                fingers['thumb']['up'] and 
+                not any(fingers[f]['up'] for f in ['index', 'middle', 'ring', 'pinky']))
+
+    def _compare_positions(self, pos1, pos2, threshold=0.03):
+        """Compare deux positions pour déterminer si le mouvement est significatif"""
+        try:
+            if not isinstance(pos1, dict) or not isinstance(pos2, dict):
+                print("Format de position invalide")
+                return True
+            
+            # Vérifier que les clés nécessaires sont présentes
+            required_keys = ['x', 'y', 'z']
+            if not all(k in pos1 for k in required_keys) or not all(k in pos2 for k in required_keys):
+                print("Clés manquantes dans les positions")
+                return True
+            
+            # Extraire les valeurs numériques des dictionnaires
+            x1, y1, z1 = float(pos1['x']), float(pos1['y']), float(pos1['z'])
+            x2, y2, z2 = float(pos2['x']), float(pos2['y']), float(pos2['z'])
+            
+            # Calculer la distance euclidienne
+            distance = math.sqrt(
+                (x1 - x2)**2 +
+                (y1 - y2)**2 +
+                (z1 - z2)**2
+            )
+            
+            # Retourner True si le mouvement est significatif
+            return distance > threshold
+            
+        except Exception as e:
+            print(f"Erreur lors de la comparaison des positions: {str(e)}")
+            return True
+
+    def learn_gesture(self, hands_info):
+        """Apprend un nouveau geste"""
+        try:
+            if not self.is_learning:
+                return
+            
+            # Extraire les caractéristiques de la main
+            features = self.library.extract_features(hands_info)
+            if not features:
+                return
+            
+            # Ajouter les caractéristiques à la séquence
+            self.gesture_frames.append(features)
+            print(f"Frame capturée ({len(self.gesture_frames)})")
+            
+            # Si on a assez de frames, vérifier si on doit en supprimer
+            if len(self.gesture_frames) > 1:
+                last_frame = self.gesture_frames[-2]
+                current_frame = self.gesture_frames[-1]
+                
+                # Vérifier si le mouvement est significatif
+                if not self._compare_positions(
+                    last_frame.get('palm_pos', {}),
+                    current_frame.get('palm_pos', {})
+                ):
+                    # Supprimer la dernière frame si le mouvement n'est pas significatif
+                    self.gesture_frames.pop()
+                    print("Frame ignorée (mouvement non significatif)")
+            
+            # Vérifier si on a trop de frames
+            if len(self.gesture_frames) > 100:
+                print("Trop de frames capturées !")
+                print("Veuillez refaire le geste plus lentement.")
+            else:
+                # Nettoyer la séquence et l'ajouter à la bibliothèque partagée
+                self.library.add_learned_gesture(self.current_gesture, self.gesture_frames)
+                
+        except Exception as e:
+            print(f"Erreur lors de l'apprentissage: {str(e)}")
+            import traceback
+            print("Traceback complet:")
+            print(traceback.format_exc())
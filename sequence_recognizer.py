@@ -0,0 +1,133 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Résultat d'une reconnaissance de séquence (temps de début et de fin du geste)
+SequenceMatch = namedtuple('SequenceMatch', ['name', 'score', 'start_time', 'end_time'])
+
+
+class SpringRecognizer:
+    """Reconnaissance en continu des gestes dynamiques par DTW de sous-séquence (SPRING)
+
+    Chaque geste de la bibliothèque garde une seule colonne DTW, mise à jour
+    en O(longueur de la séquence) à chaque nouvelle frame. La distance locale
+    entre la frame courante et une frame de référence vaut 1 - score du
+    GestureMatcher, calculé pour toute la bibliothèque en une passe.
+
+    Les colonnes portent sur l'instantané de la bibliothèque pris au dernier
+    reset : une modification publiée entre-temps n'est vue qu'après reset.
+    """
+
+    def __init__(self, matcher, tolerance=0.35, min_duration=0.2):
+        self.matcher = matcher
+        # Distance moyenne maximale le long du chemin pour valider un geste
+        self.tolerance = tolerance
+        # Durée minimale d'un geste reconnu (secondes)
+        self.min_duration = min_duration
+        self.reset()
+
+    def reset(self):
+        """Réinitialise les colonnes DTW (à appeler quand la bibliothèque change)"""
+        self.snapshot = self.matcher.snapshot
+        lengths = np.asarray(self.snapshot.lengths, dtype=np.int64)
+        n_gestures = len(lengths)
+        max_length = int(lengths.max()) if n_gestures else 0
+
+        self.lengths = lengths
+        self.max_length = max_length
+
+        # Indices des frames de référence de chaque geste, complétés jusqu'à max_length
+        steps = np.arange(max_length)
+        self.valid = steps[None, :] < lengths[:, None]
+        self.frame_index = np.where(
+            self.valid,
+            np.asarray(self.snapshot.offsets, dtype=np.int64)[:, None] + steps[None, :],
+            0
+        )
+
+        # Colonne 0 = point de départ libre (0 à chaque instant)
+        self.distances = np.full((n_gestures, max_length + 1), np.inf)
+        self.path_lengths = np.zeros((n_gestures, max_length + 1))
+        self.start_times = np.zeros((n_gestures, max_length + 1))
+
+        # Meilleure correspondance en attente de confirmation pour chaque geste
+        self.best_distance = np.full(n_gestures, np.inf)
+        self.best_path_length = np.ones(n_gestures)
+        self.best_start = np.zeros(n_gestures)
+        self.best_end = np.zeros(n_gestures)
+
+    def update(self, features, timestamp=None):
+        """Ajoute une frame et retourne les gestes dont la fin vient d'être confirmée"""
+        if timestamp is None:
+            timestamp = time.time()
+        if not len(self.lengths):
+            return []
+
+        scores = self.matcher.score_frames(features, snapshot=self.snapshot)
+        local = np.where(self.valid, 1.0 - scores[self.frame_index], np.inf)
+
+        prev = self.distances
+        prev_len = self.path_lengths
+        prev_start = self.start_times
+
+        cur = np.empty_like(prev)
+        cur_len = np.empty_like(prev_len)
+        cur_start = np.empty_like(prev_start)
+        cur[:, 0] = 0.0
+        cur_len[:, 0] = 0.0
+        cur_start[:, 0] = timestamp
+
+        rows = np.arange(len(self.lengths))
+        for j in range(1, self.max_length + 1):
+            # Prédécesseurs : même frame (j-1), frame précédente (j), diagonale (j-1)
+            options = np.stack((cur[:, j - 1], prev[:, j], prev[:, j - 1]))
+            choice = np.argmin(options, axis=0)
+            cur[:, j] = local[:, j - 1] + options[choice, rows]
+            cur_len[:, j] = np.stack((cur_len[:, j - 1], prev_len[:, j], prev_len[:, j - 1]))[choice, rows] + 1
+            cur_start[:, j] = np.stack((cur_start[:, j - 1], prev_start[:, j], prev_start[:, j - 1]))[choice, rows]
+
+        self.distances = cur
+        self.path_lengths = cur_len
+        self.start_times = cur_start
+
+        matches = []
+
+        # Confirmer les correspondances qui ne peuvent plus être améliorées
+        pending = np.isfinite(self.best_distance)
+        if pending.any():
+            columns = cur[:, 1:]
+            starts = cur_start[:, 1:]
+            can_improve = (
+                self.valid &
+                (columns < self.best_distance[:, None]) &
+                (starts <= self.best_end[:, None])
+            )
+            confirmed = pending & ~can_improve.any(axis=1)
+            for g in np.flatnonzero(confirmed):
+                score = 1.0 - self.best_distance[g] / self.best_path_length[g]
+                matches.append(SequenceMatch(
+                    self.snapshot.names[g], float(score),
+                    float(self.best_start[g]), float(self.best_end[g])
+                ))
+                # Empêcher les chevauchements avec la correspondance rapportée
+                overlap = starts[g] <= self.best_end[g]
+                cur[g, 1:][overlap] = np.inf
+                self.best_distance[g] = np.inf
+
+        # Nouvelle meilleure fin de geste candidate
+        end_distance = cur[rows, self.lengths]
+        end_length = np.maximum(cur_len[rows, self.lengths], 1)
+        end_start = cur_start[rows, self.lengths]
+        improved = (
+            (end_distance / end_length <= self.tolerance) &
+            (timestamp - end_start >= self.min_duration) &
+            (end_distance < self.best_distance)
+        )
+        self.best_distance[improved] = end_distance[improved]
+        self.best_path_length[improved] = end_length[improved]
+        self.best_start[improved] = end_start[improved]
+        self.best_end[improved] = timestamp
+
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import threading
+
+
+class SpeechCache:
+    """Cache disque des phrases déjà synthétisées (fichiers WAV)
+
+    Chaque fichier est identifié par le texte, la voix, la vitesse et la
+    langue : changer de voix ne réutilise pas d'anciens enregistrements.
+    La date de modification sert d'horodatage d'utilisation ; au-delà de
+    max_bytes, les fichiers les moins récemment utilisés sont supprimés.
+    """
+
+    def __init__(self, directory="speech_cache", max_bytes=20 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, text, voice, rate, language):
+        """Chemin du fichier WAV correspondant à la phrase et aux réglages"""
+        key = "\0".join([text, str(voice), str(rate), str(language)])
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + ".wav")
+
+    def get(self, text, voice, rate, language):
+        """Retourne le fichier en cache (None s'il n'existe pas) et le marque utilisé"""
+        path = self.path_for(text, voice, rate, language)
+        with self.lock:
+            try:
+                os.utime(path)
+            except OSError:
+                return None
+        return path
+
+    def store(self, engine, text, voice, rate, language):
+        """Synthétise la phrase dans le cache avec pyttsx3 (thread du moteur uniquement)"""
+        path = self.path_for(text, voice, rate, language)
+        temp_path = path[:-4] + ".tmp.wav"
+        engine.save_to_file(text, temp_path)
+        engine.runAndWait()
+        if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+            raise Exception(f"Aucun fichier audio produit pour '{text}'")
+        with self.lock:
+            # Fichier complet uniquement : jamais de WAV tronqué dans le cache
+            os.replace(temp_path, path)
+            self._evict(keep=path)
+        return path
+
+    def _evict(self, keep=None):
+        """Supprime les fichiers les moins récemment utilisés au-delà de max_bytes"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".wav") or name.endswith(".tmp.wav"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+
+# Priorités des phrases
+NORMAL = 'normal'
+CORRECTION = 'correction'
+
+
+class SpeechScheduler:
+    """File des phrases à dire, bornée en latence
+
+    - max_age : une phrase qui attend depuis plus de max_age secondes n'est
+      plus d'actualité et n'est pas dite.
+    - Regroupement : les signes en attente sont dits ensemble en une seule
+      phrase (doublons consécutifs fusionnés, max_phrase_words signes au
+      plus, les plus récents étant gardés).
+    - Correction : passe devant tout le reste, remplace les signes en
+      attente et interrompt la phrase en cours.
+    Les tâches de fond (pré-synthèse) ne passent que si rien n'est à dire.
+    """
+
+    def __init__(self, max_age=2.0, max_phrase_words=4):
+        self.max_age = max_age
+        self.max_phrase_words = max_phrase_words
+        self.condition = threading.Condition()
+        self.pending = deque()  # (texte, instant d'arrivée)
+        self.correction = None  # (texte, instant d'arrivée)
+        self.background = deque()
+        self.interrupt = threading.Event()
+
+        # Métriques
+        self.enqueued = 0
+        self.spoken = 0
+        self.coalesced = 0
+        self.dropped_stale = 0
+        self.dropped_overflow = 0
+        self.dropped_superseded = 0
+        self.max_depth = 0
+        self.first_audio_total = 0.0
+        self.last_first_audio = None
+
+    def put(self, text, priority=NORMAL):
+        """Ajoute une phrase à dire"""
+        now = time.perf_counter()
+        with self.condition:
+            self.enqueued += 1
+            if priority == CORRECTION:
+                # Les signes en attente (et une correction pas encore dite) sont remplacés
+                self.dropped_superseded += len(self.pending) + (self.correction is not None)
+                self.pending.clear()
+                self.correction = (text, now)
+                self.interrupt.set()
+            else:
+                self.pending.append((text, now))
+                self.max_depth = max(self.max_depth, len(self.pending))
+            self.condition.notify()
+
+    def put_background(self, item):
+        """Ajoute une tâche de fond (exécutée quand rien n'est à dire)"""
+        with self.condition:
+            self.background.append(item)
+            self.condition.notify()
+
+    def get(self):
+        """Attend la prochaine tâche
+
+        Retourne ('speak', [signes], instant d'arrivée du plus ancien) ou
+        ('background', élément).
+        """
+        with self.condition:
+            while True:
+                if self.correction is not None:
+                    text, enqueued_at = self.correction
+                    self.correction = None
+                    self.interrupt.clear()
+                    return 'speak', [text], enqueued_at
+
+                phrase, enqueued_at = self._take_phrase()
+                if phrase:
+                    return 'speak', phrase, enqueued_at
+
+                if self.background:
+                    return 'background', self.background.popleft()
+                self.condition.wait()
+
+    def _take_phrase(self):
+        """Regroupe les signes en attente encore d'actualité"""
+        now = time.perf_counter()
+        phrase = []
+        while self.pending:
+            text, arrived = self.pending.popleft()
+            if now - arrived > self.max_age:
+                self.dropped_stale += 1
+                continue
+            if phrase and phrase[-1][0] == text:
+                self.coalesced += 1
+                continue
+            phrase.append((text, arrived))
+        if len(phrase) > self.max_phrase_words:
+            # Garder les signes les plus récents
+            self.dropped_overflow += len(phrase) - self.max_phrase_words
+            phrase = phrase[-self.max_phrase_words:]
+        if not phrase:
+            return [], None
+        return [text for text, _ in phrase], phrase[0][1]
+
+    def audio_started(self, enqueued_at):
+        """Signale le début de la lecture (temps avant le premier son)"""
+        with self.condition:
+            self.spoken += 1
+            self.last_first_audio = time.perf_counter() - enqueued_at
+            self.first_audio_total += self.last_first_audio
+
+    def depth(self):
+        with self.condition:
+            return len(self.pending) + (self.correction is not None)
+
+    def report(self):
+        """Profondeur de file, temps avant le premier son, phrases perdues"""
+        with self.condition:
+            return {
+                'depth': len(self.pending) + (self.correction is not None),
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'spoken': self.spoken,
+                'coalesced': self.coalesced,
+                'avg_first_audio': self.first_audio_total / self.spoken if self.spoken else 0.0,
+                'last_first_audio': self.last_first_audio,
+                'dropped_stale': self.dropped_stale,
+                'dropped_overflow': self.dropped_overflow,
+                'dropped_superseded': self.dropped_superseded,
+                'dropped': self.dropped_stale + self.dropped_overflow + self.dropped_superseded
+            }
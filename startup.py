@@ -0,0 +1,80 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Durée de chaque phase du démarrage de l'application"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = {}  # Phase -> durée (s)
+        self.milestones = {}  # Étape -> temps depuis le lancement (s)
+
+    @contextmanager
+    def phase(self, name):
+        """Mesure la durée d'une phase (utilisable depuis plusieurs threads)"""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases[name] = time.perf_counter() - begin
+
+    def mark(self, name):
+        """Note le temps écoulé depuis le lancement (fenêtre affichée, prêt...)"""
+        with self.lock:
+            self.milestones[name] = time.perf_counter() - self.start
+
+    def summary(self):
+        with self.lock:
+            milestones = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.milestones.items())
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        return f"Démarrage : {milestones} ({phases})"
+
+
+class BackgroundLoader:
+    """Initialise les sous-systèmes lourds en parallèle, hors du thread Tk
+
+    Chaque tâche tourne dans son propre thread et mesure sa phase dans le
+    rapport de démarrage. ready est levé quand toutes les tâches sont
+    terminées ; errors contient les tâches en échec.
+    """
+
+    def __init__(self, report):
+        self.report = report
+        self.tasks = []
+        self.results = {}
+        self.errors = {}
+        self.ready = threading.Event()
+
+    def add(self, name, func):
+        """Ajoute une tâche : func() retourne le sous-système initialisé"""
+        self.tasks.append((name, func))
+
+    def _run(self, name, func):
+        try:
+            with self.report.phase(name):
+                self.results[name] = func()
+        except BaseException as e:  # sys.exit compris : le thread Tk doit être prévenu
+            print(f"Erreur lors de l'initialisation ({name}): {str(e)}")
+            self.errors[name] = e
+
+    def start(self):
+        threads = [
+            threading.Thread(target=self._run, args=(name, func), daemon=True)
+            for name, func in self.tasks
+        ]
+        for thread in threads:
+            thread.start()
+
+        def wait_all():
+            for thread in threads:
+                thread.join()
+            self.ready.set()
+
+        threading.Thread(target=wait_all, daemon=True).start()
+
+    def get(self, name):
+        return self.results.get(name)
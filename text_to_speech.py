@@ -1,60 +1,195 @@
 import pyttsx3
 import threading
-import queue
 import sys
+import time
+from speech_cache import SpeechCache
+from speech_scheduler import CORRECTION, NORMAL, SpeechScheduler
+
+try:
+    import vlc
+except ImportError:  # Lecture des fichiers du cache impossible : synthèse directe
+    vlc = None
+
+# Attente maximale de la lecture d'un fichier du cache (s) : durée du
+# fichier plus une marge, ou délai fixe tant que la durée est inconnue
+PLAYBACK_MARGIN = 1.0
+PLAYBACK_TIMEOUT = 5.0
 
 class TextToSpeech:
-    def __init__(self):
+    def __init__(self, cache_dir="speech_cache", cache_max_bytes=20 * 1024 * 1024, language='fr',
+                 max_age=2.0, max_phrase_words=4):
         try:
-            self.engine = pyttsx3.init()
-            self.engine.setProperty('rate', 150)    # Vitesse de parole
-            self.engine.setProperty('volume', 0.9)  # Volume
-            self.speech_queue = queue.Queue()
+            self.rate = 150
+            self.language = language
+            # Phrases trop anciennes abandonnées, signes en attente regroupés
+            self.scheduler = SpeechScheduler(max_age, max_phrase_words)
             self.speaking = False
-            
-            # Définir la voix en français si disponible
-            voices = self.engine.getProperty('voices')
-            french_voice_found = False
-            for voice in voices:
-                if 'french' in voice.name.lower():
-                    self.engine.setProperty('voice', voice.id)
-                    french_voice_found = True
-                    break
-            
-            if not french_voice_found:
-                print("Attention: Aucune voix française n'a été trouvée. Utilisation de la voix par défaut.")
-            
-            # Démarrer le thread de synthèse vocale
+
+            # Phrases pré-synthétisées, lues par un lecteur unique
+            self.cache = SpeechCache(cache_dir, cache_max_bytes)
+            self.player = None
+            if vlc is not None:
+                try:
+                    self.vlc_instance = vlc.Instance('--quiet')
+                    self.player = self.vlc_instance.media_player_new()
+                except Exception as e:
+                    print(f"Lecteur audio indisponible, synthèse directe : {str(e)}")
+
+            # Démarrer le thread de synthèse vocale : il crée le moteur (COM sous
+            # Windows, lié au thread qui l'initialise) et reste seul à l'utiliser
+            self.engine = None
+            self.voice = None
+            self.ready = threading.Event()
+            self.init_error = None
             self.speech_thread = threading.Thread(target=self._speech_worker, daemon=True)
             self.speech_thread.start()
+            self.ready.wait()
+            if self.init_error is not None:
+                raise self.init_error
         except Exception as e:
             print(f"Erreur d'initialisation du moteur de synthèse vocale: {str(e)}")
             sys.exit(1)
-    
+
+    def _init_engine(self):
+        """Crée et règle le moteur de synthèse (thread de synthèse uniquement)"""
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', self.rate)    # Vitesse de parole
+        self.engine.setProperty('volume', 0.9)  # Volume
+
+        # Définir la voix en français si disponible
+        voices = self.engine.getProperty('voices')
+        french_voice_found = False
+        for voice in voices:
+            if 'french' in voice.name.lower():
+                self.engine.setProperty('voice', voice.id)
+                french_voice_found = True
+                break
+
+        if not french_voice_found:
+            print("Attention: Aucune voix française n'a été trouvée. Utilisation de la voix par défaut.")
+        self.voice = self.engine.getProperty('voice')
+
     def _speech_worker(self):
-        """Thread worker pour la synthèse vocale"""
+        """Thread worker pour la synthèse vocale
+
+        Crée le moteur puis signale qu'il est prêt (ready). Les phrases à dire
+        passent avant les pré-synthèses en attente.
+        """
+        try:
+            self._init_engine()
+        except Exception as e:
+            self.init_error = e
+            return
+        finally:
+            self.ready.set()
+
         while True:
             try:
-                text = self.speech_queue.get()
-                if text and text != "Geste non reconnu":
-                    self.speaking = True
-                    try:
-                        self.engine.say(text)
-                        self.engine.runAndWait()
-                    except Exception as e:
-                        print(f"Erreur lors de la synthèse vocale du texte '{text}': {str(e)}")
-                    finally:
-                        self.speaking = False
-                self.speech_queue.task_done()
+                kind, *item = self.scheduler.get()
+                if kind == 'background':
+                    self._prepare_text(item[0])
+                    continue
+                
+                words, enqueued_at = item
+                self.speaking = True
+                try:
+                    self._say(words, enqueued_at)
+                except Exception as e:
+                    print(f"Erreur lors de la synthèse vocale du texte '{' '.join(words)}': {str(e)}")
+                finally:
+                    self.speaking = False
             except Exception as e:
                 print(f"Erreur dans le thread de synthèse vocale: {str(e)}")
                 self.speaking = False
                 continue
-    
-    def speak(self, text):
-        """Ajoute le texte à la file d'attente de synthèse vocale"""
+
+    def _cache_key(self, text):
+        return text, self.voice, self.rate, self.language
+
+    def _prepare_text(self, text):
+        """Synthétise la phrase dans le cache si elle n'y est pas déjà"""
+        if self.player is None or self.cache.get(*self._cache_key(text)):
+            return
         try:
-            if not self.speaking and text:  # Vérifier que le texte n'est pas vide
-                self.speech_queue.put(text)
+            self.cache.store(self.engine, *self._cache_key(text))
         except Exception as e:
-            print(f"Erreur lors de l'ajout du texte à la file d'attente: {str(e)}")
\ No newline at end of file
+            print(f"Erreur lors de la pré-synthèse du texte '{text}': {str(e)}")
+
+    def _say(self, words, enqueued_at):
+        """Dit les signes regroupés, chacun lu depuis le cache (synthétisé d'abord si absent)"""
+        if self.player is None:
+            self.scheduler.audio_started(enqueued_at)
+            self._say_direct(words)
+            return
+
+        for index, text in enumerate(words):
+            path = self.cache.get(*self._cache_key(text))
+            if path is None:
+                path = self.cache.store(self.engine, *self._cache_key(text))
+            if self.scheduler.interrupt.is_set():
+                return
+            self.player.set_media(self.vlc_instance.media_new(path))
+            self.player.play()
+            if index == 0:
+                self.scheduler.audio_started(enqueued_at)
+
+            # Attendre la fin de la lecture, sauf si une correction arrive
+            time.sleep(0.05)
+            if not self._wait_playback():
+                # Lecture bloquée ou en erreur : synthèse directe de la suite
+                self.player.stop()
+                print(f"Lecture audio impossible, synthèse directe : '{text}'")
+                self._say_direct(words[index:])
+                return
+            if self.scheduler.interrupt.is_set():
+                return
+
+    def _wait_playback(self):
+        """Attend la fin du fichier en cours (arrêté si une correction arrive)
+
+        Retourne False si la lecture échoue ou dépasse sa durée plus une marge.
+        """
+        started = time.time()
+        deadline = started + PLAYBACK_TIMEOUT
+        while True:
+            state = self.player.get_state()
+            if state in (vlc.State.Ended, vlc.State.Stopped):
+                return True
+            if state == vlc.State.Error:
+                return False
+            if self.scheduler.interrupt.wait(0.01):
+                self.player.stop()
+                return True
+            length = self.player.get_length()  # ms, 0 ou -1 tant qu'inconnue
+            if length > 0:
+                deadline = started + length / 1000.0 + PLAYBACK_MARGIN
+            if time.time() > deadline:
+                return False
+
+    def _say_direct(self, words):
+        """Synthèse directe par le moteur, sans passer par le cache"""
+        self.engine.say(' '.join(words))
+        self.engine.runAndWait()
+
+    def prepare(self, texts):
+        """Pré-synthétise des phrases (noms de gestes) en arrière-plan"""
+        for text in texts:
+            if text:
+                self.scheduler.put_background(text)
+
+    def speak(self, text, correction=False):
+        """Ajoute le texte à la file d'attente de synthèse vocale (sans bloquer)
+
+        correction : le texte remplace les signes en attente et interrompt
+        la phrase en cours. Réservé aux appelants de l'API : l'application
+        ne dit que des signes normaux (aucun geste n'est révisé après coup).
+        """
+        try:
+            if text and text != "Geste non reconnu":  # Vérifier que le texte n'est pas vide
+                self.scheduler.put(text, CORRECTION if correction else NORMAL)
+        except Exception as e:
+            print(f"Erreur lors de l'ajout du texte à la file d'attente: {str(e)}")
+
+    def report(self):
+        """Métriques de la file : profondeur, temps avant le premier son, phrases perdues"""
+        return self.scheduler.report()
@@ -1,63 +1,322 @@
 import cv2
 import os
+import threading
+import time
+from collections import deque
+
+class CaptureThread(threading.Thread):
+    """Thread de capture qui lit les frames en continu
+
+    En mode caméra, seule la frame la plus récente (ou un petit tampon
+    circulaire) est gardée : les anciennes frames sont écrasées. En mode
+    fichier « aussi vite que possible », le tampon est borné mais aucune
+    frame n'est perdue : la lecture attend que le consommateur suive.
+    """
+
+    def __init__(self, cap, buffer_size=1, drop_frames=True, pace_fps=None, is_file=False):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.buffer_size = max(1, buffer_size)
+        self.drop_frames = drop_frames
+        self.pace_fps = pace_fps
+        self.is_file = is_file
+
+        self.buffer = deque(maxlen=self.buffer_size if drop_frames else None)
+        self.condition = threading.Condition()
+        self.sequence = 0
+        self.dropped_frames = 0
+        self.finished = False
+        self._stopped = threading.Event()
+        self._pace_changed = threading.Event()
+        # Libération de la capture par ce thread s'il est encore bloqué dans cap.read() à l'arrêt
+        self._exit_lock = threading.Lock()
+        self._exited = False
+        self._release_on_exit = False
+
+    def run(self):
+        try:
+            self._read_loop()
+        finally:
+            with self._exit_lock:
+                self._exited = True
+                if self._release_on_exit:
+                    self.cap.release()
+
+    def _read_loop(self):
+        next_time = time.time()
+        while not self._stopped.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.is_file:
+                    break
+                # Caméra momentanément indisponible
+                time.sleep(0.005)
+                continue
+
+            timestamp = time.time()
+            position_msec = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+            with self.condition:
+                if not self.drop_frames:
+                    # Attendre de la place dans le tampon (aucune frame perdue)
+                    while len(self.buffer) >= self.buffer_size and not self._stopped.is_set():
+                        self.condition.wait(0.1)
+                elif len(self.buffer) == self.buffer_size:
+                    self.dropped_frames += 1
+                self.sequence += 1
+                self.buffer.append((frame, self.sequence, timestamp, position_msec))
+                self.condition.notify_all()
+
+            # Lecture au rythme de la vidéo (ou cadence réduite en veille)
+            pace_fps = self.pace_fps
+            if pace_fps:
+                next_time += 1.0 / pace_fps
+                delay = next_time - time.time()
+                if delay > 0:
+                    # Attente interrompue par un changement de cadence (sortie de veille)
+                    if self._pace_changed.wait(delay):
+                        self._pace_changed.clear()
+                        next_time = time.time()
+                else:
+                    next_time = time.time()
+            else:
+                next_time = time.time()
+
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def set_pace(self, fps):
+        """Change la cadence de lecture (None : aussi vite que la source)"""
+        self.pace_fps = fps
+        self._pace_changed.set()
+
+    def latest(self):
+        """Retourne la frame la plus récente sans attendre (ou None)"""
+        with self.condition:
+            return self.buffer[-1] if self.buffer else None
+
+    def next(self, timeout=None):
+        """Retourne la frame suivante dans l'ordre (attend si nécessaire)"""
+        with self.condition:
+            if not self.buffer and not self.finished:
+                self.condition.wait(timeout)
+            if not self.buffer:
+                return None
+            item = self.buffer.popleft()
+            self.condition.notify_all()
+            return item
+
+    def stop(self, release=False):
+        """Arrête la lecture
+
+        release : libère aussi la capture. Si le thread est encore bloqué
+        dans cap.read() après l'attente, c'est lui qui la libère au retour de
+        la lecture (jamais de libération pendant une lecture en cours).
+        """
+        self._stopped.set()
+        self._pace_changed.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.is_alive():
+            self.join(timeout=1.0)
+        if release:
+            with self._exit_lock:
+                if self._exited:
+                    self.cap.release()
+                else:
+                    self._release_on_exit = True
 
 class VideoSource:
     def __init__(self):
         self.cap = None
-    
-    def open_local_video(self, video_path):
-        """Ouvre une vidéo locale comme source"""
-        try:
-            if not os.path.exists(video_path):
-                raise Exception(f"Le fichier vidéo n'existe pas: {video_path}")
-            
-            # Libérer l'ancienne capture si elle existe
-            if self.cap is not None:
-                self.cap.release()
-            
-            # Ouvrir la vidéo avec OpenCV
-            self.cap = cv2.VideoCapture(video_path)
-            if not self.cap.isOpened():
-                raise Exception("Impossible d'ouvrir la vidéo")
-            
-            # Définir la taille de la vidéo
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            
-            print("Vidéo locale ouverte avec succès")
-            return True
-            
-        except Exception as e:
-            print(f"Erreur lors de l'ouverture de la vidéo locale: {str(e)}")
-            if self.cap is not None:
-                self.cap.release()
-                self.cap = None
-            return False
-    
-    def open_camera(self, camera_id=0):
-        """Ouvre la caméra comme source"""
-        try:
-            if self.cap is not None:
-                self.cap.release()
-            
-            self.cap = cv2.VideoCapture(camera_id)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
-            
-            return self.cap.isOpened()
-        except Exception as e:
-            print(f"Erreur lors de l'ouverture de la caméra: {str(e)}")
-            return False
-    
+        self.capture_thread = None
+        self.is_file = False
+        self.fps = 0  # Cadence lue une seule fois à l'ouverture (0 si inconnue)
+        # Source lue par un thread dédié : jamais de lecture directe en repli
+        self.threaded = False
+        # Ouverture, libération et lecture directe exclusives (changement de source)
+        self.lock = threading.RLock()
+        self.frame_sequence = 0
+        self.last_timestamp = 0
+        self.last_position_msec = 0.0
+
+    def open_local_video(self, video_path, threaded=False, fast=False, buffer_size=8, start_msec=0):
+        """Ouvre une vidéo locale comme source
+
+        threaded : lecture dans un thread dédié.
+        fast : décodage aussi vite que possible (traitement hors ligne),
+        sinon la lecture suit la cadence de la vidéo.
+        start_msec : position de départ dans la vidéo (ms).
+        """
+        with self.lock:
+            try:
+                if not os.path.exists(video_path):
+                    raise Exception(f"Le fichier vidéo n'existe pas: {video_path}")
+
+                # Libérer l'ancienne capture si elle existe
+                self.release()
+
+                # Ouvrir la vidéo avec OpenCV
+                self.cap = cv2.VideoCapture(video_path)
+                if not self.cap.isOpened():
+                    raise Exception("Impossible d'ouvrir la vidéo")
+
+                # Définir la taille de la vidéo
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                self.is_file = True
+                self.threaded = threaded
+                self.fps = self._read_fps()
+
+                # Positionner avant le démarrage du thread de lecture
+                if start_msec > 0:
+                    self.cap.set(cv2.CAP_PROP_POS_MSEC, start_msec)
+
+                if threaded:
+                    if fast:
+                        self._start_capture_thread(buffer_size=buffer_size, drop_frames=False)
+                    else:
+                        self._start_capture_thread(buffer_size=1, drop_frames=True, pace_fps=self.fps)
+
+                print("Vidéo locale ouverte avec succès")
+                return True
+
+            except Exception as e:
+                print(f"Erreur lors de l'ouverture de la vidéo locale: {str(e)}")
+                self.release()
+                return False
+
+    def open_camera(self, camera_id=0, threaded=False, buffer_size=1):
+        """Ouvre la caméra comme source
+
+        threaded : capture dans un thread dédié qui ne garde que les
+        buffer_size frames les plus récentes.
+        """
+        with self.lock:
+            try:
+                self.release()
+
+                self.cap = cv2.VideoCapture(camera_id)
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                self.cap.set(cv2.CAP_PROP_FPS, 30)
+                self.is_file = False
+                self.threaded = threaded
+
+                if not self.cap.isOpened():
+                    return False
+                self.fps = self._read_fps()
+
+                if threaded:
+                    # Limiter le tampon interne d'OpenCV pour éviter les frames périmées
+                    self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                    self._start_capture_thread(buffer_size=buffer_size, drop_frames=True)
+                return True
+            except Exception as e:
+                print(f"Erreur lors de l'ouverture de la caméra: {str(e)}")
+                return False
+
+    def _start_capture_thread(self, buffer_size, drop_frames, pace_fps=None):
+        """Démarre la lecture des frames dans un thread dédié"""
+        self.capture_thread = CaptureThread(
+            self.cap,
+            buffer_size=buffer_size,
+            drop_frames=drop_frames,
+            pace_fps=pace_fps,
+            is_file=self.is_file
+        )
+        self.capture_thread.start()
+
+    def _read_fps(self):
+        """Lit la cadence annoncée par la capture (0 si inconnue)"""
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        return fps if fps and fps > 0 else 0
+
+    def get_fps(self):
+        """Retourne la cadence de la source (0 si inconnue), sans interroger la capture"""
+        return self.fps
+
+    def set_capture_rate(self, fps):
+        """Réduit (fps) ou rétablit (None) la cadence de capture de la caméra"""
+        if self.capture_thread is not None and not self.is_file:
+            self.capture_thread.set_pace(fps)
+
     def read(self):
         """Lit une frame de la source vidéo"""
         if self.cap is None:
             return False, None
+        if self.capture_thread is not None:
+            ret, frame, _, _ = self.read_latest()
+            return ret, frame
         return self.cap.read()
-    
+
+    def read_latest(self):
+        """Retourne la frame la plus récente sans bloquer
+
+        Retourne (ret, frame, numéro de séquence, horodatage de capture).
+        Le numéro de séquence permet de savoir si la frame a déjà été traitée.
+        """
+        capture_thread = self.capture_thread
+        if capture_thread is None:
+            # Mode synchrone : lecture directe, jamais pendant un changement de
+            # source ni avant le démarrage du thread d'une source threadée
+            with self.lock:
+                if self.cap is None or self.threaded:
+                    return False, None, self.frame_sequence, self.last_timestamp
+                ret, frame = self.cap.read()
+                if ret:
+                    self.frame_sequence += 1
+                    self.last_timestamp = time.time()
+                    self.last_position_msec = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+                return ret, frame, self.frame_sequence, self.last_timestamp
+
+        item = capture_thread.latest()
+        if item is None:
+            return False, None, self.frame_sequence, self.last_timestamp
+        frame, self.frame_sequence, self.last_timestamp, self.last_position_msec = item
+        return True, frame, self.frame_sequence, self.last_timestamp
+
+    def read_next(self, timeout=None):
+        """Retourne la frame suivante sans en sauter (lecture de fichier rapide)
+
+        Retourne (ret, frame, numéro de séquence, horodatage de capture).
+        """
+        capture_thread = self.capture_thread
+        if capture_thread is None:
+            result = self.read_latest()
+            if not result[0] and timeout:
+                # Source absente ou en cours de changement : ne pas boucler à vide
+                time.sleep(min(timeout, 0.01))
+            return result
+        item = capture_thread.next(timeout)
+        if item is None:
+            if capture_thread.finished and timeout:
+                # Thread arrêté (changement de source, fin de fichier) : next() ne bloque plus
+                time.sleep(min(timeout, 0.01))
+            return False, None, self.frame_sequence, self.last_timestamp
+        frame, self.frame_sequence, self.last_timestamp, self.last_position_msec = item
+        return True, frame, self.frame_sequence, self.last_timestamp
+
+    def get_position_msec(self):
+        """Position dans la vidéo (ms) de la dernière frame lue"""
+        return self.last_position_msec
+
+    def is_finished(self):
+        """Indique si la lecture d'un fichier est terminée"""
+        if self.capture_thread is not None:
+            return self.capture_thread.finished and self.capture_thread.latest() is None
+        return self.cap is None
+
     def release(self):
         """Libère les ressources"""
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
\ No newline at end of file
+        with self.lock:
+            if self.capture_thread is not None:
+                # La capture est libérée par le thread (ou dès qu'il a fini de lire)
+                self.capture_thread.stop(release=True)
+                self.capture_thread = None
+                self.cap = None
+            if self.cap is not None:
+                self.cap.release()
+                self.cap = None
+            self.threaded = False
+            self.fps = 0